@@ -0,0 +1,74 @@
+'''Per-scroll latency of extracting the tweet links of the current screen
+
+Compares the former one-IPC-call-per-article extraction with the single `page.evaluate` extraction
+of `TwitterParser`, on a synthetic timeline page.
+
+    python benchmarks/dom_extraction_benchmark.py --articles 40 --repeats 50
+'''
+import statistics
+import time
+from typing import Callable
+
+import typer
+from playwright.sync_api import Page, sync_playwright
+
+from twtvt.utils import TwitterParser
+
+
+def build_timeline_html(article_count: int) -> str:
+    articles = ''.join(f'''
+        <article>
+            <div>
+                <a href="/user{index}">user{index}</a>
+                <a href="/user{index}">@user{index}</a>
+                <a href="/user{index}/photo">photo</a>
+                <a href="/user{index}/status/{index}"><time>1h</time></a>
+            </div>
+            {'<video></video>' if index % 2 == 0 else ''}
+        </article>''' for index in range(article_count))
+    return f'<html><body>{articles}</body></html>'
+
+
+def extract_per_article(page: Page) -> list[str]:
+    '''The extraction before the batched `page.evaluate`, kept as the baseline'''
+    articles = page.locator('article:has(video)')
+    return [
+        'https://twitter.com' +
+        (articles.nth(i).locator('div').locator('a').nth(3).get_attribute('href', timeout=500) or '')
+        for i in range(articles.count())
+    ]
+
+
+def measure(extract: Callable[[], list[str]], repeats: int) -> list[float]:
+    latencies: list[float] = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        extract()
+        latencies.append((time.perf_counter() - started_at) * 1000)
+    return latencies
+
+
+def main(articles: int = typer.Option(40, help='Rendered articles per screen.'), repeats: int = 50):
+    with sync_playwright() as playwright_sync:
+        browser = playwright_sync.webkit.launch()
+        page = browser.new_page()
+        page.set_content(build_timeline_html(articles))
+        twitter_parser = TwitterParser(page)
+
+        assert extract_per_article(page) == twitter_parser._get_video_tweets_in_current_screen()  # type: ignore
+        results = {
+            'per-article locators': measure(lambda: extract_per_article(page), repeats),
+            'single evaluate': measure(
+                lambda: twitter_parser._get_video_tweets_in_current_screen(),  # type: ignore
+                repeats,
+            ),
+        }
+        browser.close()
+
+    for name, latencies in results.items():
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        print(f'{name:>22}: p50 {statistics.median(latencies):8.2f} ms / p99 {p99:8.2f} ms per scroll')
+
+
+if __name__ == '__main__':
+    typer.run(main)
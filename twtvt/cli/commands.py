@@ -4,29 +4,98 @@ import typer
 from typer import Typer
 
 from twtvt.utils import download_video
+from twtvt.utils.connection_budget import ConnectionBudget, parse_byte_size
+from twtvt.utils.job_queue import WorkerRole
+from twtvt.utils.scroll_policy import ScrollPolicy
 
 cli_app = Typer()
 
 
 @cli_app.command()
 def twtvt(
-        target_uris: list[str] = typer.Argument(
-            ...,
-            help="Video tweet link, target user's likes or media, or file path.",
-        ),
-        username: Optional[str] = typer.Option(None, help='Your twitter credentials username.'),
-        password: Optional[str] = typer.Option(None, help='Your twitter credentials password.'),
-        cookies_from_browser: Optional[str] = typer.Option(None, help='Browser to get cookies from. '),
-        output: str = typer.Option('.', help='Output path for downloaded videos.'),
-        debug: bool = typer.Option(False, help='Enable debug mode. This disables headless mode of Browser.'),
-        until_link: Optional[str] = typer.Option(
-            None,
-            help="Keeps finding videos until this link is found. None for no limit. Only for user's likes or media.",
-        ),
-        parallel: bool = typer.Option(False, help='Download videos in parallel.'),
+    target_uris: Optional[list[str]] = typer.Argument(
+        None,
+        help="Video tweet link, target user's likes or media, or file path. "
+        'Optional with --resume or --role download.',
+    ),
+    username: Optional[str] = typer.Option(None, help='Your twitter credentials username.'),
+    password: Optional[str] = typer.Option(None, help='Your twitter credentials password.'),
+    cookies_from_browser: Optional[str] = typer.Option(None, help='Browser to get cookies from. '),
+    output: str = typer.Option('.', help='Output path for downloaded videos.'),
+    debug: bool = typer.Option(False, help='Enable debug mode. This disables headless mode of Browser.'),
+    until_link: Optional[str] = typer.Option(
+        None,
+        help="Keeps finding videos until this link is found. None for no limit. Only for user's likes or media.",
+    ),
+    parallel: bool = typer.Option(False, help='Download videos in parallel.'),
+    workers: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help='Number of videos downloaded at the same time with --parallel. Defaults to the number of CPUs.',
+    ),
+    archive: Optional[str] = typer.Option(
+        None,
+        help='Path of the download archive. Defaults to .twtvt-archive.sqlite3 in the output path.',
+    ),
+    no_archive: bool = typer.Option(False, help='Neither skip nor record already downloaded videos.'),
+    capture_responses: bool = typer.Option(
+        False,
+        help="Collect video tweets from the timeline network responses instead of the rendered page. "
+        "Only for user's likes or media.",
+    ),
+    limit: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help="Finds at most this many newest videos per user's likes or media. None for no limit.",
+    ),
+    scroll_delta: int = typer.Option(ScrollPolicy.wheel_delta, help='Pixels to scroll the timelines at once.'),
+    scroll_max_wait: float = typer.Option(
+        ScrollPolicy.max_wait,
+        help='Seconds to wait at most for new tweets after each scroll.',
+    ),
+    scrape_concurrency: int = typer.Option(
+        1,
+        help="Number of user's likes or media crawled at the same time, sharing one logged-in browser.",
+    ),
+    block_resources: bool = typer.Option(
+        True,
+        help='Block images, fonts and autoplaying videos while crawling, since only the links are needed.',
+    ),
+    session_cache: bool = typer.Option(True, help='Reuse the logged-in browser session of previous runs.'),
+    direct_download: bool = typer.Option(
+        True,
+        help='Download the videos found in the timeline responses directly, without extracting them again.',
+    ),
+    segment_concurrency: int = typer.Option(8, help='Video segments downloaded at the same time per video.'),
+    max_connections: int = typer.Option(
+        ConnectionBudget.DEFAULT_MAX_CONNECTIONS,
+        help='Connections used at most by all the downloads together, split among the videos and their fragments.',
+    ),
+    max_bandwidth: Optional[str] = typer.Option(
+        None,
+        help='Bytes per second downloaded at most by all the downloads together, like 512K or 10M.',
+    ),
+    retry_failed: bool = typer.Option(
+        False,
+        help='Retry the videos failed permanently in previous runs, like deleted or protected tweets.',
+    ),
+    resume: Optional[str] = typer.Option(
+        None,
+        help='Journal of an interrupted run, written in its output path, to continue where it stopped.',
+    ),
+    queue: Optional[str] = typer.Option(
+        None,
+        help='Path of a job queue shared by several twtvt processes, on one host or on hosts sharing a filesystem.',
+    ),
+    role: WorkerRole = typer.Option(
+        WorkerRole.ALL,
+        help='With --queue, scrape the targets into the queue, download the queued videos, or both.',
+    ),
 ):
+    if not target_uris and not resume and role is not WorkerRole.DOWNLOAD:
+        raise typer.BadParameter('Either target uris or --resume is required.')
     download_video(
-        target_uris=target_uris,
+        target_uris=target_uris or [],
         username=username,
         password=password,
         output=output,
@@ -34,4 +103,21 @@ def twtvt(
         cookies_from_browser=cookies_from_browser,
         until_link=until_link,
         parallel=parallel,
+        archive=archive,
+        use_archive=not no_archive,
+        capture_responses=capture_responses,
+        limit=limit,
+        scroll_policy=ScrollPolicy(wheel_delta=scroll_delta, max_wait=scroll_max_wait),
+        scrape_concurrency=scrape_concurrency,
+        block_resources=block_resources,
+        use_session_cache=session_cache,
+        direct_download=direct_download,
+        segment_concurrency=segment_concurrency,
+        max_connections=max_connections,
+        max_bandwidth=parse_byte_size(max_bandwidth) if max_bandwidth else None,
+        retry_failed=retry_failed,
+        workers=workers,
+        resume=resume,
+        queue=queue,
+        role=role,
     )
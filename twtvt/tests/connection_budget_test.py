@@ -0,0 +1,74 @@
+import threading
+import time
+from typing import Callable
+
+import pytest
+
+from twtvt.utils.connection_budget import ConnectionBudget, parse_byte_size
+
+
+def _run_in_thread(target: Callable[[], None], timeout: float = 5) -> None:
+    '''Runs the target, failing instead of hanging when it blocks on the budget'''
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'blocked on the connection budget'
+
+
+def test_connection_budget_splits_connections_among_files():
+    connection_budget = ConnectionBudget(max_connections=8, file_slots=2)
+    fragment_counts: list[int] = []
+
+    def reserve_two_files() -> None:
+        with connection_budget.reserve_file() as first_fragment_count:
+            with connection_budget.reserve_file() as second_fragment_count:
+                fragment_counts.extend([first_fragment_count, second_fragment_count])
+                assert connection_budget.snapshot()['connections_in_use'] == 8
+
+    _run_in_thread(reserve_two_files)
+
+    assert fragment_counts == [4, 4]
+    assert connection_budget.snapshot()['connections_in_use'] == 0
+
+
+def test_connection_budget_never_exceeds_max_connections():
+    connection_budget = ConnectionBudget(max_connections=3)
+    peak_connections = 0
+    lock = threading.Lock()
+
+    def download() -> None:
+        nonlocal peak_connections
+        with connection_budget.connection():
+            with lock:
+                peak_connections = max(peak_connections, int(connection_budget.snapshot()['connections_in_use']))
+            time.sleep(0.01)
+
+    def download_all() -> None:
+        threads = [threading.Thread(target=download) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    _run_in_thread(download_all)
+
+    assert peak_connections == 3
+
+
+def test_connection_budget_throttles_bandwidth():
+    connection_budget = ConnectionBudget(max_bandwidth=1000)
+
+    started_at = time.monotonic()
+    connection_budget.consume(1000)  # the burst allowance
+    connection_budget.consume(200)
+
+    assert time.monotonic() - started_at >= 0.15
+    assert connection_budget.snapshot()['transferred_bytes'] == 1200
+
+
+def test_parse_byte_size():
+    assert parse_byte_size('512') == 512
+    assert parse_byte_size('512K') == 512 * 1024
+    assert parse_byte_size('1.5MB') == int(1.5 * 1024**2)
+    with pytest.raises(ValueError):
+        parse_byte_size('fast')
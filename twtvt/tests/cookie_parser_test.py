@@ -0,0 +1,9 @@
+from twtvt.utils.cookie_parser import TWITTER_COOKIE_DOMAINS, is_cookie_of_domains
+
+
+def test_is_cookie_of_domains_matches_the_domain_and_subdomains_only():
+    assert is_cookie_of_domains('.twitter.com', TWITTER_COOKIE_DOMAINS)
+    assert is_cookie_of_domains('x.com', TWITTER_COOKIE_DOMAINS)
+    assert is_cookie_of_domains('.api.x.com', TWITTER_COOKIE_DOMAINS)
+    assert not is_cookie_of_domains('.netflix.com', TWITTER_COOKIE_DOMAINS)
+    assert not is_cookie_of_domains('.dropbox.com', TWITTER_COOKIE_DOMAINS)
@@ -0,0 +1,9 @@
+from twtvt.utils.crawl_filter import should_block_request
+
+
+def test_blocks_media_but_not_playlists_or_api():
+    assert should_block_request('https://pbs.twimg.com/media/abc.jpg', 'image')
+    assert should_block_request('https://abs.twimg.com/fonts/chirp.woff2', 'font')
+    assert should_block_request('https://video.twimg.com/ext_tw_video/1/pu/vid/0/3000/480x270/a.m4s', 'fetch')
+    assert not should_block_request('https://video.twimg.com/ext_tw_video/1/pu/pl/a.m3u8?tag=12', 'fetch')
+    assert not should_block_request('https://twitter.com/i/api/graphql/abc/Likes?variables=%7B%7D', 'fetch')
@@ -0,0 +1,109 @@
+from pathlib import Path
+
+import httpx
+import pytest
+
+from twtvt.utils.direct_downloader import DirectDownloader, DirectDownloadError, parse_master_playlist
+
+MASTER_PLAYLIST = '''#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=256000,RESOLUTION=480x270
+/pl/270/low.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2176000,RESOLUTION=1280x720
+/pl/720/high.m3u8
+'''
+MEDIA_PLAYLIST = '''#EXTM3U
+#EXT-X-MAP:URI="/vid/720/init.mp4"
+#EXTINF:3.0,
+/vid/720/0.m4s
+#EXTINF:3.0,
+/vid/720/1.m4s
+#EXTINF:3.0,
+/vid/720/2.m4s
+#EXT-X-ENDLIST
+'''
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == '/master.m3u8':
+        return httpx.Response(200, text=MASTER_PLAYLIST)
+    if request.url.path == '/pl/720/high.m3u8':
+        return httpx.Response(200, text=MEDIA_PLAYLIST)
+    if request.url.path.startswith('/vid/720/'):
+        return httpx.Response(200, content=request.url.path.encode())
+    return httpx.Response(404)
+
+
+def test_downloads_best_variant_segments_in_order(tmp_path: Path):
+    output_path = tmp_path / 'video.mp4'
+    client = httpx.Client(transport=httpx.MockTransport(_handler))
+
+    with DirectDownloader(client=client, max_concurrent_segments=2) as direct_downloader:
+        direct_downloader.download_hls('https://video.twimg.com/master.m3u8', str(output_path))
+
+    assert output_path.read_bytes() == b'/vid/720/init.mp4/vid/720/0.m4s/vid/720/1.m4s/vid/720/2.m4s'
+
+
+def test_parse_master_playlist_with_audio_group():
+    variants, audio_uris = parse_master_playlist(
+        '#EXT-X-MEDIA:NAME="Audio",TYPE=AUDIO,GROUP-ID="audio-128000",URI="/aud/128000/a.m3u8"\n'
+        '#EXT-X-STREAM-INF:AVERAGE-BANDWIDTH=800000,BANDWIDTH=1000000,RESOLUTION=640x360,AUDIO="audio-128000"\n'
+        '/pl/360/v.m3u8\n',
+        'https://video.twimg.com/ext_tw_video/1/pu/pl/master.m3u8',
+    )
+
+    assert variants[0].height == 360
+    assert variants[0].bandwidth == 1000000
+    assert audio_uris[variants[0].audio_group or ''] == 'https://video.twimg.com/aud/128000/a.m3u8'
+
+
+def test_failed_segment_raises_direct_download_error_without_partial_file(tmp_path: Path):
+    output_path = tmp_path / 'video.mp4'
+
+    def _failing_handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == '/vid/720/1.m4s':
+            return httpx.Response(503)
+        return _handler(request)
+
+    client = httpx.Client(transport=httpx.MockTransport(_failing_handler))
+    with DirectDownloader(client=client, max_concurrent_segments=2) as direct_downloader:
+        with pytest.raises(DirectDownloadError, match='503'):
+            direct_downloader.download_hls('https://video.twimg.com/master.m3u8', str(output_path))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_resumes_partial_file(tmp_path: Path):
+    output_path = tmp_path / 'video.mp4'
+    (tmp_path / 'video.mp4.part').write_bytes(b'0123')
+    requested_ranges: list[str] = []
+
+    def _range_handler(request: httpx.Request) -> httpx.Response:
+        requested_ranges.append(request.headers.get('Range', ''))
+        return httpx.Response(206, content=b'456789')
+
+    client = httpx.Client(transport=httpx.MockTransport(_range_handler))
+    with DirectDownloader(client=client) as direct_downloader:
+        direct_downloader.download_file('https://video.twimg.com/video.mp4', str(output_path))
+
+    assert requested_ranges == ['bytes=4-']
+    assert output_path.read_bytes() == b'0123456789'
+
+
+def test_resumes_partial_playlist_after_the_written_segments(tmp_path: Path):
+    output_path = tmp_path / 'video.mp4'
+    # the init segment and the first segment were written, the second one was cut off
+    (tmp_path / 'video.mp4.part').write_bytes(b'/vid/720/init.mp4/vid/720/0.m4s/vid/7')
+    (tmp_path / 'video.mp4.part.progress').write_text('2 31')
+    requested_paths: list[str] = []
+
+    def _recording_handler(request: httpx.Request) -> httpx.Response:
+        requested_paths.append(request.url.path)
+        return _handler(request)
+
+    client = httpx.Client(transport=httpx.MockTransport(_recording_handler))
+    with DirectDownloader(client=client, max_concurrent_segments=2) as direct_downloader:
+        direct_downloader.download_hls('https://video.twimg.com/master.m3u8', str(output_path))
+
+    assert output_path.read_bytes() == b'/vid/720/init.mp4/vid/720/0.m4s/vid/720/1.m4s/vid/720/2.m4s'
+    assert [path for path in requested_paths if path.startswith('/vid/')] == ['/vid/720/1.m4s', '/vid/720/2.m4s']
+    assert list(tmp_path.iterdir()) == [output_path]
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from twtvt.utils.download_archive import DownloadArchive
+
+
+def test_archive_persists_downloaded_tweets(tmp_path: Path):
+    link = 'https://twitter.com/twtvtOfficial/status/1599748329927499777'
+
+    with DownloadArchive.in_directory(str(tmp_path)) as archive:
+        assert not archive.contains(link)
+        archive.add(link, media_ids=('1599748329927499777', ), file_paths=('video.mp4', ))
+
+    with DownloadArchive.in_directory(str(tmp_path)) as archive:
+        assert archive.contains(link + '?s=20')
+        assert not archive.contains('https://twitter.com/twtvtOfficial/status/1')
+
+
+def test_archive_key_of_non_twitter_link():
+    assert DownloadArchive.get_key('https://monsnode.com/v1506575871309589251?foo=bar') == \
+        'https://monsnode.com/v1506575871309589251'
+
+
+def test_archive_records_permanent_failures(tmp_path: Path):
+    link = 'https://twitter.com/twtvtOfficial/status/1'
+
+    with DownloadArchive.in_directory(str(tmp_path)) as archive:
+        assert archive.get_failure_reason(link) is None
+        archive.add_failure(link, 'This tweet is unavailable')
+        assert archive.get_failure_reason(link + '?s=20') == 'This tweet is unavailable'
+        archive.remove_failure(link)
+        assert archive.get_failure_reason(link) is None
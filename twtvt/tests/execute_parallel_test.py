@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+from typing import Iterator
+
+import pytest
+
+from twtvt.utils.execute_parallel import ExecutorMode, execute_parallel
+
+
+def _sleep_and_return(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+async def _async_sleep_and_return(seconds: float) -> float:
+    await asyncio.sleep(seconds)
+    return seconds
+
+
+def test_yields_results_as_completed():
+    results = list(execute_parallel(_sleep_and_return, [(0.2, ), (0.01, )], workers=2))
+
+    assert results == [0.01, 0.2]
+
+
+def test_yields_results_in_order():
+    results = list(execute_parallel(_sleep_and_return, [(0.2, ), (0.01, )], workers=2, ordered=True))
+
+    assert results == [0.2, 0.01]
+
+
+def test_consumes_args_as_the_workers_keep_up():
+    consumed_count = 0
+    release = threading.Event()
+
+    def _args() -> Iterator[tuple[float]]:
+        nonlocal consumed_count
+        for _ in range(100):
+            consumed_count += 1
+            yield (0, )
+
+    def _wait(seconds: float) -> float:
+        release.wait(5)
+        return seconds
+
+    results = execute_parallel(_wait, _args(), workers=2, max_pending=4)
+    threading.Timer(0.1, release.set).start()
+    next(results)
+
+    assert consumed_count <= 5
+    results.close()
+
+
+@pytest.mark.parametrize('mode', [ExecutorMode.PROCESS, ExecutorMode.ASYNC])
+def test_other_modes(mode: ExecutorMode):
+    func = _async_sleep_and_return if mode is ExecutorMode.ASYNC else _sleep_and_return
+
+    results = execute_parallel(func, [(0.01, ), (0, )], workers=2, mode=mode, ordered=True)
+
+    assert list(results) == [0.01, 0]
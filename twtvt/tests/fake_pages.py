@@ -0,0 +1,89 @@
+'''Fake playwright pages rendering a synthetic timeline, shared by the parser and scrape engine tests'''
+from typing import Any, Callable
+
+from twtvt.utils.timeline_crawler import ARTICLES_IN_CURRENT_SCREEN_SCRIPT
+
+
+class FakeMouse:
+
+    def __init__(self, page: 'FakeTimelinePage'):
+        self.page = page
+
+    def wheel(self, delta_x: float, delta_y: float) -> None:
+        self.page.offset = max(min(self.page.offset + 3, len(self.page.hrefs) - self.page.screen_size), 0)
+
+
+class FakeTimelinePage:
+    '''Renders `screen_size` articles of the timeline at once, moving 3 articles per scroll'''
+
+    def __init__(self, tweet_count: int, screen_size: int = 5):
+        self.hrefs = [f'/twtvtOfficial/status/{index}' for index in range(tweet_count)]
+        self.screen_size = screen_size
+        self.offset = 0
+        self.mouse = FakeMouse(self)
+
+    def on(self, event: str, handler: Callable[..., None]) -> None:
+        pass
+
+    def goto(self, url: str) -> None:
+        pass
+
+    def wait_for_selector(self, selector: str) -> None:
+        pass
+
+    def wait_for_timeout(self, timeout: float) -> None:
+        pass
+
+    def evaluate(self, script: str) -> Any:
+        hrefs = self.hrefs[self.offset:self.offset + self.screen_size]
+        if script == ARTICLES_IN_CURRENT_SCREEN_SCRIPT:
+            return [{'href': href, 'hasVideo': True} for href in hrefs]
+        return f"{len(hrefs)}:{hrefs[-1] if hrefs else ''}"
+
+
+class FakeAsyncMouse:
+
+    def __init__(self, page: FakeTimelinePage):
+        self.page = page
+
+    async def wheel(self, delta_x: float, delta_y: float) -> None:
+        self.page.mouse.wheel(delta_x, delta_y)
+
+
+class FakeAsyncTimelinePage:
+    '''Async page of `FakeContext`, rendering 10 tweets of the user in the url'''
+
+    def __init__(self, context: 'FakeContext'):
+        self.context = context
+        self.timeline = FakeTimelinePage(tweet_count=0)
+        self.mouse = FakeAsyncMouse(self.timeline)
+        self.url = ''
+
+    def on(self, event: str, handler: Callable[..., None]) -> None:
+        pass
+
+    async def goto(self, url: str) -> None:
+        self.url = url
+        username = url.split('/')[3]
+        self.timeline.hrefs = [f'/{username}/status/{index}' for index in range(10)]
+
+    async def wait_for_selector(self, selector: str) -> None:
+        pass
+
+    async def wait_for_timeout(self, timeout: float) -> None:
+        pass
+
+    async def evaluate(self, script: str) -> Any:
+        return self.timeline.evaluate(script)
+
+    async def close(self) -> None:
+        self.context.closed_page_count += 1
+
+
+class FakeContext:
+
+    def __init__(self):
+        self.closed_page_count = 0
+
+    async def new_page(self) -> FakeAsyncTimelinePage:
+        return FakeAsyncTimelinePage(self)
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from twtvt.utils.job_journal import JobJournal
+
+LINKS = [f'https://twitter.com/user/status/{status_id}' for status_id in range(3)]
+
+
+def test_replays_the_pending_links(tmp_path: Path):
+    with JobJournal.in_directory(str(tmp_path), target_uris=['https://twitter.com/user/likes']) as journal:
+        for link in LINKS:
+            journal.record_discovered(link)
+        journal.record_started(LINKS[0])
+        journal.record_completed(LINKS[0])
+        journal.record_started(LINKS[1])  # interrupted
+
+    state = JobJournal.replay(journal.path)
+
+    assert state.target_uris == ['https://twitter.com/user/likes']
+    assert state.pending_links == LINKS[1:]
+    assert not state.is_crawled
+
+
+def test_ignores_the_line_cut_off_by_a_crash(tmp_path: Path):
+    path = tmp_path / 'journal.jsonl'
+    with JobJournal(str(path)) as journal:
+        journal.record_discovered(LINKS[0])
+    with open(path, 'a') as f:
+        f.write('{"event": "discovered", "li')
+
+    with JobJournal(str(path)) as journal:  # resumed
+        journal.record_discovered(LINKS[1])
+        journal.record_crawled()
+    state = JobJournal.replay(str(path))
+
+    assert state.pending_links == LINKS[:2]
+    assert state.is_crawled
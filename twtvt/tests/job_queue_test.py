@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from twtvt.utils.job_queue import JobQueue, JobState
+
+LINKS = [f'https://twitter.com/user/status/{status_id}' for status_id in range(3)]
+
+
+def test_workers_lease_each_link_once(tmp_path: Path):
+    path = str(tmp_path / 'queue.sqlite3')
+    with JobQueue(path, owner='scraper') as scraper, JobQueue(path, owner='worker-1') as worker_1, \
+            JobQueue(path, owner='worker-2') as worker_2:
+        scraper.register_producer()
+        assert scraper.put_all(LINKS + LINKS[:1]) == 3
+        scraper.unregister_producer()
+
+        links_1 = [worker_1.lease(), worker_1.lease()]
+        links_2 = [worker_2.lease(), worker_2.lease()]
+        for link in links_1:
+            worker_1.ack(link or '')
+        worker_2.ack(links_2[0] or '')
+
+        assert links_1 + links_2 == [*LINKS, None]
+        assert scraper.get_counts()[JobState.DONE] == 3
+        assert list(worker_2.iter_leased()) == []  # drained, and no scraper is queueing links
+
+
+def test_expired_lease_is_leased_again(tmp_path: Path):
+    path = str(tmp_path / 'queue.sqlite3')
+    with JobQueue(path, owner='crashed', visibility_timeout=0) as crashed_worker, \
+            JobQueue(path, owner='worker') as worker:
+        crashed_worker.put_all(LINKS[:1])
+
+        assert crashed_worker.lease() == LINKS[0]
+        assert worker.lease() == LINKS[0]
+        crashed_worker.ack(LINKS[0])  # too late, the link is leased by the other worker
+        assert worker.get_counts()[JobState.LEASED] == 1
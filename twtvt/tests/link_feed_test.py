@@ -0,0 +1,26 @@
+from typing import Iterator
+
+import pytest
+
+from twtvt.utils.link_feed import LinkFeed
+
+
+def test_link_feed_yields_links_in_order():
+    links = [f'https://twitter.com/twtvtOfficial/status/{index}' for index in range(1000)]
+
+    link_feed = LinkFeed(iter(links), max_size=4).start()
+
+    assert list(link_feed) == links
+    assert link_feed.discovered_count == len(links)
+
+
+def test_link_feed_reraises_scraper_error():
+
+    def _failing_links() -> Iterator[str]:
+        yield 'https://twitter.com/twtvtOfficial/status/1'
+        raise ValueError('scraping failed')
+
+    link_feed = LinkFeed(_failing_links()).start()
+
+    with pytest.raises(ValueError, match='scraping failed'):
+        list(link_feed)
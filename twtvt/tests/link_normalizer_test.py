@@ -0,0 +1,20 @@
+from typing import Optional
+
+import pytest
+
+from twtvt.utils.link_normalizer import normalize_link
+
+TWEET_LINK = 'https://twitter.com/twtvtOfficial/status/1599748329927499777'
+
+
+@pytest.mark.parametrize('line, link', [
+    (TWEET_LINK, TWEET_LINK),
+    ('  https://x.com/twtvtOfficial/status/1599748329927499777?s=20\n', TWEET_LINK),
+    ('https://mobile.twitter.com/twtvtOfficial/status/1599748329927499777/video/1', TWEET_LINK),
+    ('x.com/twtvtOfficial/status/1599748329927499777', TWEET_LINK),
+    ('https://monsnode.com/v1506575871309589251?ref=top', 'https://monsnode.com/v1506575871309589251'),
+    ('https://twitter.com/twtvtOfficial/likes', None),
+    ('not a link', None),
+])
+def test_normalize_link(line: str, link: Optional[str]):
+    assert normalize_link(line) == link
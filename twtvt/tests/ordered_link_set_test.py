@@ -0,0 +1,12 @@
+from twtvt.utils.ordered_link_set import OrderedLinkSet
+
+
+def test_add_new_returns_only_unseen_links_in_order():
+    links = OrderedLinkSet(['a', 'b'])
+
+    new_links = links.add_new(['c', 'a', 'd', 'c'])
+
+    assert new_links == ['c', 'd']
+    assert list(links) == ['a', 'b', 'c', 'd']
+    assert 'd' in links
+    assert len(links) == 4
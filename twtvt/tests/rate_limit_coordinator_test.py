@@ -0,0 +1,53 @@
+from twtvt.utils.rate_limit_coordinator import RateLimitCoordinator
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _get_coordinator(clock: FakeClock) -> RateLimitCoordinator:
+    return RateLimitCoordinator(
+        max_rate=10,
+        min_rate=1,
+        cooldown=60,
+        max_cooldown=240,
+        ramp_up=100,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+
+def test_pauses_every_worker_on_429_then_ramps_up():
+    clock = FakeClock()
+    coordinator = _get_coordinator(clock)
+
+    coordinator.report_rate_limited()
+    coordinator.report_rate_limited()  # the same burst of 429s from the other workers
+    assert coordinator.get_current_rate() == 0
+
+    coordinator.acquire()
+    assert clock.now >= 60
+    assert coordinator.get_current_rate() < 2
+
+    clock.now += 100
+    assert coordinator.get_current_rate() == 10
+
+
+def test_repeated_429_doubles_the_pause():
+    clock = FakeClock()
+    coordinator = _get_coordinator(clock)
+
+    coordinator.report_rate_limited()
+    clock.now = 70  # still ramping up
+    coordinator.report_rate_limited()
+
+    coordinator.acquire()
+    assert clock.now >= 70 + 120
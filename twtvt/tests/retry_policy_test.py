@@ -0,0 +1,36 @@
+import httpx
+import pytest
+from tenacity import retry
+
+from twtvt.utils.direct_downloader import DirectDownloadError
+from twtvt.utils.retry_policy import Backoff, ErrorClass, RetryPolicy, classify_error
+
+
+def test_classify_error():
+    assert classify_error(Exception('ERROR: [twitter] 1: No video could be found in this tweet')) is \
+        ErrorClass.PERMANENT
+    assert classify_error(Exception('HTTP Error 404: Not Found')) is ErrorClass.PERMANENT
+    assert classify_error(Exception('HTTP Error 429: Too Many Requests')) is ErrorClass.RATE_LIMITED
+    assert classify_error(DirectDownloadError('failed', status_code=429)) is ErrorClass.RATE_LIMITED
+    assert classify_error(httpx.ConnectError('connection reset')) is ErrorClass.TRANSIENT
+    assert classify_error(Exception('HTTP Error 503: Service Unavailable')) is ErrorClass.TRANSIENT
+
+
+def test_retry_policy_by_error_class():
+    policy = RetryPolicy({
+        ErrorClass.PERMANENT: Backoff(max_attempts=1),
+        ErrorClass.RATE_LIMITED: Backoff(max_attempts=2, base=0),
+        ErrorClass.TRANSIENT: Backoff(max_attempts=3, base=0),
+    })
+    attempts: list[str] = []
+
+    @retry(reraise=True, retry=policy.should_retry, stop=policy.should_stop, wait=policy.get_wait)
+    def _fail(message: str):
+        attempts.append(message)
+        raise Exception(message)
+
+    for message, attempt_count in (('no video', 1), ('429', 2), ('connection reset', 3)):
+        attempts.clear()
+        with pytest.raises(Exception, match=message):
+            _fail(message)
+        assert len(attempts) == attempt_count
@@ -0,0 +1,26 @@
+from twtvt.tests.fake_pages import FakeContext
+from twtvt.utils.execute_parallel import iter_async
+from twtvt.utils.scrape_engine import crawl_video_links
+from twtvt.utils.scroll_policy import ScrollPolicy
+
+
+def test_crawls_every_target_concurrently():
+    context = FakeContext()
+    target_links = [
+        'https://twitter.com/twtvtOfficial/status/1',
+        *(f'https://twitter.com/user{index}/media' for index in range(5)),
+    ]
+
+    links = list(
+        iter_async(
+            crawl_video_links(
+                context,  # type: ignore
+                target_links,
+                concurrency=3,
+                scroll_policy=ScrollPolicy(max_wait=0.01, max_stale_scrolls=2),
+            )))
+
+    assert links[0] == 'https://twitter.com/twtvtOfficial/status/1'
+    assert len(links) == 1 + 5 * 10
+    assert len(set(links)) == len(links)
+    assert context.closed_page_count == 5
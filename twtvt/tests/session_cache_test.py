@@ -0,0 +1,35 @@
+import time
+from pathlib import Path
+
+from twtvt.utils.session_cache import SessionCache
+
+
+def _storage_state(expires: float) -> dict[str, object]:
+    return {'cookies': [{'name': 'auth_token', 'value': 'token', 'domain': '.twitter.com', 'expires': expires}]}
+
+
+def test_reuses_the_saved_session(tmp_path: Path):
+    session_cache = SessionCache.for_identity('user-twtvtOfficial', directory=str(tmp_path))
+    assert session_cache.load() is None
+
+    session_cache.save(_storage_state(expires=time.time() + 60))
+
+    assert session_cache.load() == _storage_state(
+        expires=session_cache.load()['cookies'][0]['expires'])  # type: ignore
+
+
+def test_ignores_expired_session(tmp_path: Path):
+    session_cache = SessionCache.for_identity('browser-chrome', directory=str(tmp_path))
+    session_cache.save(_storage_state(expires=time.time() - 60))
+    assert session_cache.load() is None
+
+    session_cache.save(_storage_state(expires=-1))
+    session_cache.max_age = -1
+    assert session_cache.load() is None
+
+
+def test_ignores_auth_token_of_other_domains(tmp_path: Path):
+    session_cache = SessionCache.for_identity('browser-chrome', directory=str(tmp_path))
+    session_cache.save({'cookies': [{'name': 'auth_token', 'value': 'token', 'domain': '.netflix.com'}]})
+
+    assert session_cache.load() is None
@@ -0,0 +1,15 @@
+import os
+
+from twtvt.utils.spilling_link_set import SpillingLinkSet
+
+
+def test_deduplicates_across_the_spilled_links():
+    with SpillingLinkSet(['a', 'b'], max_memory_links=3) as link_set:
+        new_links = [link for link in ['a', 'c', 'd', 'b', 'e', 'd'] if link_set.add_new(link)]
+        spilled_path = link_set._path
+
+        assert new_links == ['c', 'd', 'e']
+        assert len(link_set) == 5
+        assert spilled_path and os.path.exists(spilled_path)
+
+    assert not os.path.exists(spilled_path)
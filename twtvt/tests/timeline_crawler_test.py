@@ -0,0 +1,19 @@
+from twtvt.utils.scroll_policy import ScrollPolicy
+from twtvt.utils.timeline_crawler import TimelineScrollState, parse_rendered_articles
+
+
+def test_scroll_state_stops_after_stale_scrolls():
+    scroll_state = TimelineScrollState('', None, ScrollPolicy(max_stale_scrolls=2))
+
+    assert scroll_state.add_found_links(['a', 'b']) == ['a', 'b']
+    scroll_state.has_new_content = False
+    assert scroll_state.add_found_links(['b']) == []
+    assert not scroll_state.is_finished
+    assert scroll_state.add_found_links(['a']) == []
+    assert scroll_state.is_finished
+
+
+def test_parse_rendered_articles_skips_articles_not_rendered_yet():
+    articles = [{'href': '/a/status/1', 'hasVideo': True}, {'href': None, 'hasVideo': False}]
+
+    assert parse_rendered_articles(articles) == [('https://twitter.com/a/status/1', True)]
@@ -0,0 +1,79 @@
+from typing import Any
+
+from twtvt.utils.timeline_response_parser import is_timeline_response, parse_timeline_video_tweets
+
+
+def _tweet_entry(status_id: str, media_type: str) -> dict[str, Any]:
+    return {
+        'content': {
+            'itemContent': {
+                'tweet_results': {
+                    'result': {
+                        '__typename': 'Tweet',
+                        'rest_id': status_id,
+                        'core': {
+                            'user_results': {
+                                'result': {
+                                    'legacy': {
+                                        'screen_name': 'twtvtOfficial'
+                                    }
+                                }
+                            }
+                        },
+                        'legacy': {
+                            'full_text': 'hello',
+                            'extended_entities': {
+                                'media': [{
+                                    'id_str': f'{status_id}0',
+                                    'type': media_type,
+                                    'video_info': {
+                                        'variants': [{
+                                            'content_type': 'application/x-mpegURL',
+                                            'url': 'https://video.twimg.com/a.m3u8'
+                                        }]
+                                    },
+                                }]
+                            },
+                        },
+                    }
+                }
+            }
+        }
+    }
+
+
+def test_parse_timeline_video_tweets_in_order():
+    payload = {
+        'data': {
+            'user': {
+                'result': {
+                    'timeline_v2': {
+                        'timeline': {
+                            'instructions': [{
+                                'entries': [
+                                    _tweet_entry('2', 'video'),
+                                    _tweet_entry('1', 'photo'),
+                                    _tweet_entry('3', 'animated_gif'),
+                                ]
+                            }]
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    tweets = parse_timeline_video_tweets(payload)
+
+    assert [tweet.link for tweet in tweets] == [
+        'https://twitter.com/twtvtOfficial/status/2',
+        'https://twitter.com/twtvtOfficial/status/3',
+    ]
+    assert tweets[0].media[0].media_id == '20'
+    assert tweets[0].media[0].variants[0].is_hls
+
+
+def test_is_timeline_response():
+    assert is_timeline_response('https://twitter.com/i/api/graphql/abc/Likes?variables=%7B%7D')
+    assert is_timeline_response('https://twitter.com/i/api/graphql/abc/UserMedia?variables=%7B%7D')
+    assert not is_timeline_response('https://twitter.com/i/api/graphql/abc/UserTweets?variables=%7B%7D')
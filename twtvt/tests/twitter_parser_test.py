@@ -0,0 +1,43 @@
+import pytest
+
+from twtvt.tests.fake_pages import FakeTimelinePage
+from twtvt.utils.scroll_policy import ScrollPolicy
+from twtvt.utils.twitter_parser import TwitterParser
+
+
+def _get_parser(page: FakeTimelinePage) -> TwitterParser:
+    return TwitterParser(page, scroll_policy=ScrollPolicy(max_wait=0.01, max_stale_scrolls=2))  # type: ignore
+
+
+def test_scrolls_to_the_bottom_in_timeline_order():
+    page = FakeTimelinePage(tweet_count=20)
+
+    links = _get_parser(page).get_all_media_video_tweets('twtvtOfficial')
+
+    assert links == [f'https://twitter.com{href}' for href in page.hrefs]
+
+
+def test_stops_at_until_link_and_limit():
+    page = FakeTimelinePage(tweet_count=20)
+    until_link = 'https://twitter.com/twtvtOfficial/status/7'
+
+    assert _get_parser(page).get_liked_video_tweets_until('twtvtOfficial', until_link)[-1] == until_link
+    page.offset = 0
+    assert len(list(_get_parser(page).iter_liked_video_tweets_until('twtvtOfficial', '', limit=4))) == 4
+
+
+def test_rejects_non_positive_limit():
+    page = FakeTimelinePage(tweet_count=20)
+
+    with pytest.raises(ValueError, match='limit'):
+        list(_get_parser(page).iter_media_video_tweets_until('twtvtOfficial', '', limit=-1))
+
+
+def test_get_recent_liked_tweet_waits_for_the_rendered_link():
+    page = FakeTimelinePage(tweet_count=0)
+
+    with pytest.raises(ValueError, match='No liked tweet'):
+        _get_parser(page).get_recent_liked_tweet('twtvtOfficial', timeout=10)
+
+    page.hrefs = ['/twtvtOfficial/status/1']
+    assert _get_parser(page).get_recent_liked_tweet('twtvtOfficial') == 'https://twitter.com/twtvtOfficial/status/1'
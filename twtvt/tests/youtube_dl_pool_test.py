@@ -0,0 +1,26 @@
+import threading
+
+import yt_dlp
+
+from twtvt.utils.youtube_dl_pool import YoutubeDLPool
+
+
+def test_reuses_the_instance_of_each_thread():
+    pool = YoutubeDLPool(lambda: {'quiet': True})
+    instances: list[yt_dlp.YoutubeDL] = []
+
+    def _acquire_twice():
+        instances.extend((pool.acquire(), pool.acquire()))
+
+    _acquire_twice()
+    thread = threading.Thread(target=_acquire_twice)
+    thread.start()
+    thread.join()
+
+    assert instances[0] is instances[1]
+    assert instances[2] is instances[3]
+    assert instances[0] is not instances[2]
+    stats = pool.get_stats()
+    assert (stats.instance_count, stats.link_count) == (2, 4)
+    assert stats.setup_seconds_per_link == stats.setup_seconds / 4
+    pool.close()
@@ -0,0 +1,184 @@
+import time
+from http.cookiejar import CookieJar
+from typing import Any, AsyncIterator, Optional
+
+from playwright.async_api import Error, Page, Response, Route
+
+from twtvt.utils.crawl_filter import should_block_request
+from twtvt.utils.logger import logger
+from twtvt.utils.scroll_policy import ScrollPolicy
+from twtvt.utils.timeline_crawler import (
+    ARTICLES_IN_CURRENT_SCREEN_SCRIPT,
+    CONTENT_MARKER_SCRIPT,
+    HOME_URL,
+    LOGGED_IN_SELECTOR,
+    LOGIN_URL,
+    PASSWORD_LABEL,
+    TIMELINE_SELECTOR,
+    USERNAME_INPUT_SELECTOR,
+    USERNAME_LABEL,
+    TimelineCapture,
+    TimelineScrollState,
+    parse_rendered_articles,
+    to_playwright_cookies,
+)
+from twtvt.utils.timeline_response_parser import TimelineTweet
+
+
+class AsyncTwitterParser:
+    '''asyncio counterpart of `TwitterParser` for crawling timelines on many pages of one browser context at once
+    The crawl rules are shared with `TwitterParser` in `timeline_crawler`; this class only does the I/O.
+    '''
+    page: Page
+    capture_timeline_responses: bool
+    scroll_policy: ScrollPolicy
+
+    def __init__(
+        self,
+        page: Page,
+        capture_timeline_responses: bool = False,
+        scroll_policy: ScrollPolicy = ScrollPolicy(),
+        timeline_tweets: Optional[dict[str, TimelineTweet]] = None,
+        collect_timeline_tweets: bool = False,
+    ):
+        '''`timeline_tweets` may be shared among the parsers to collect the captured tweets in one place
+        `collect_timeline_tweets` fills `timeline_tweets` from the timeline responses
+        even when the links are found in the rendered articles
+        '''
+        self.page = page
+        self.capture_timeline_responses = capture_timeline_responses
+        self.scroll_policy = scroll_policy
+        self._timeline_capture = TimelineCapture(
+            capture_responses=capture_timeline_responses or collect_timeline_tweets,
+            timeline_tweets=timeline_tweets,
+        )
+        self._timeline_capture.attach(page)
+
+    @property
+    def timeline_tweets(self) -> dict[str, TimelineTweet]:
+        '''The tweets captured from the timeline responses, keyed by their link'''
+        return self._timeline_capture.timeline_tweets
+
+    async def enable_crawl_mode(self) -> None:
+        '''Aborts the requests of images, fonts and video segments, which are not needed to find the tweets'''
+        await self.page.route('**/*', self._crawl_route_handler)
+
+    async def disable_crawl_mode(self) -> None:
+        await self.page.unroute('**/*', self._crawl_route_handler)
+
+    async def _crawl_route_handler(self, route: Route) -> None:
+        if should_block_request(route.request.url, route.request.resource_type):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def login(self, username: str, password: str, timeout: Optional[float] = 10000) -> None:
+        logger.info('Logging in...')
+        await self.page.goto(LOGIN_URL)
+        await self.page.wait_for_selector(USERNAME_INPUT_SELECTOR)
+        await self.page.get_by_label(USERNAME_LABEL).click()
+        await self.page.get_by_label(USERNAME_LABEL).fill(username)
+        await self.page.get_by_label(USERNAME_LABEL).press('Enter')
+        try:
+            password_input = self.page.get_by_label(PASSWORD_LABEL, exact=True)
+            await password_input.fill(password, timeout=timeout)
+            await password_input.press('Enter')
+        except Error as error:
+            raise ValueError('Login failed; Maybe username or password is incorrect?') from error
+        await self.page.wait_for_url(HOME_URL)
+        logger.info('Logged in successfully.')
+
+    async def is_logged_in(self, timeout: float = 10000) -> bool:
+        '''Opens the home timeline, returning whether it is rendered for a logged-in user within `timeout` ms'''
+        await self.page.goto(HOME_URL)
+        try:
+            await self.page.wait_for_selector(LOGGED_IN_SELECTOR, timeout=timeout)
+        except Error:
+            return False
+        return True
+
+    async def login_with_cookiejar(self, cookiejar: CookieJar) -> None:
+        logger.info('Logging in by cookies...')
+        await self.page.context.add_cookies(to_playwright_cookies(cookiejar))  # type: ignore
+        await self.page.goto(HOME_URL)
+
+    async def iter_liked_video_tweets_until(
+        self,
+        username: str,
+        until_link: str,
+        scroll_timeout: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        '''Scrolling down the list of liked tweets until the given `until_link` found
+        Yields the links of liked tweets in the timeline order as soon as they appear, at most `limit` links
+        '''
+        await self._goto_tweets(f'https://twitter.com/{username}/likes')
+        async for link in self._iter_video_tweets_until(until_link, scroll_timeout, limit):
+            yield link
+
+    async def iter_media_video_tweets_until(
+        self,
+        username: str,
+        until_link: str,
+        scroll_timeout: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        '''Scrolling down the list of media tweets until the given `until_link` found
+        Yields the links of media tweets in the timeline order as soon as they appear, at most `limit` links
+        '''
+        await self._goto_tweets(f'https://twitter.com/{username}/media')
+        async for link in self._iter_video_tweets_until(until_link, scroll_timeout, limit):
+            yield link
+
+    async def _goto_tweets(self, url: str) -> None:
+        await self.page.goto(url)
+        await self.page.wait_for_selector(TIMELINE_SELECTOR)
+
+    async def _iter_video_tweets_until(
+        self,
+        until_link: str,
+        scroll_timeout: Optional[float],
+        limit: Optional[int],
+    ) -> AsyncIterator[str]:
+        scroll_state = TimelineScrollState(until_link, limit, self.scroll_policy, scroll_timeout)
+        while True:
+            for link in scroll_state.add_found_links(await self._get_new_video_tweets()):
+                yield link
+            if scroll_state.is_finished:
+                break
+            scroll_state.has_new_content = await self._scroll_down(max_wait=scroll_state.max_wait)
+
+    async def _scroll_down(self, max_wait: float) -> bool:
+        previous_marker: str = await self.page.evaluate(CONTENT_MARKER_SCRIPT)
+        previous_request_count = self._timeline_capture.finished_request_count
+
+        await self.page.mouse.wheel(0, self.scroll_policy.wheel_delta)
+        deadline = time.monotonic() + max_wait
+        while time.monotonic() < deadline:
+            await self.page.wait_for_timeout(self.scroll_policy.poll_interval * 1000)
+            if self._timeline_capture.finished_request_count != previous_request_count:
+                return True
+            if await self.page.evaluate(CONTENT_MARKER_SCRIPT) != previous_marker:
+                return True
+        return False
+
+    async def _get_new_video_tweets(self) -> list[str]:
+        if self.capture_timeline_responses:
+            return await self._get_video_tweets_in_captured_responses()
+        if self._timeline_capture.capture_responses:
+            await self._get_video_tweets_in_captured_responses()  # only collects the tweets
+        return await self._get_video_tweets_in_current_screen()
+
+    async def _get_video_tweets_in_captured_responses(self) -> list[str]:
+        links: list[str] = []
+        response: Response
+        for response in self._timeline_capture.take_responses():
+            try:
+                links.extend(self._timeline_capture.add_timeline_payload(await response.json()))
+            except (Error, ValueError):  # the response body is not available anymore, or not a JSON
+                logger.debug(f'Failed to read the timeline response: {response.url}')
+        return links
+
+    async def _get_video_tweets_in_current_screen(self) -> list[str]:
+        articles: list[dict[str, Any]] = await self.page.evaluate(ARTICLES_IN_CURRENT_SCREEN_SCRIPT)
+        return [href for href, has_video in parse_rendered_articles(articles) if has_video]
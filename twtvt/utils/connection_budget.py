@@ -0,0 +1,124 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+BYTE_SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?)i?B?\s*$', re.IGNORECASE)
+BYTE_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3}
+
+
+def parse_byte_size(size: str) -> int:
+    '''Parses sizes like `512K`, `10M` or `1.5G` to bytes'''
+    matched = BYTE_SIZE_PATTERN.match(size)
+    if not matched:
+        raise ValueError(f'Invalid byte size: {size}')
+    return int(float(matched.group(1)) * BYTE_SIZE_UNITS[matched.group(2).upper()])
+
+
+class ConnectionBudget:
+    '''Process-wide budget of concurrent connections and bandwidth, split across the files being downloaded
+
+    Each of the `file_slots` files downloaded at the same time reserves an equal share of the connections
+    for its fragments before it starts, so the sum of the connections of all workers never exceeds `max_connections`.
+    Every downloader reports its transferred bytes to `consume`, which throttles them all against one bandwidth limit.
+    '''
+    DEFAULT_MAX_CONNECTIONS = 32
+
+    max_connections: int
+    max_bandwidth: Optional[int]  # bytes per second
+    file_slots: int
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_bandwidth: Optional[int] = None,
+        file_slots: int = 1,
+    ):
+        if max_connections < 1:
+            raise ValueError('max_connections must be 1 or larger')
+        self.max_connections = max_connections
+        self.max_bandwidth = max_bandwidth
+        self.file_slots = max(file_slots, 1)
+        self._condition = threading.Condition()
+        self._connections_in_use = 0
+        self._active_file_count = 0
+        self._waiting_file_count = 0
+        self._transferred_bytes = 0
+        self._started_at = time.monotonic()
+        self._bandwidth_allowance = float(max_bandwidth or 0)
+        self._bandwidth_updated_at = time.monotonic()
+
+    @contextmanager
+    def reserve_file(self, max_fragments: Optional[int] = None) -> Iterator[int]:
+        '''Reserves the connections of a file, yielding how many fragments it may download at once'''
+        with self._condition:
+            self._waiting_file_count += 1
+            try:
+                while self._connections_in_use >= self.max_connections:
+                    self._condition.wait()
+            finally:
+                self._waiting_file_count -= 1
+            fragment_count = self._get_fair_share(max_fragments)
+            self._connections_in_use += fragment_count
+            self._active_file_count += 1
+        try:
+            yield fragment_count
+        finally:
+            with self._condition:
+                self._connections_in_use -= fragment_count
+                self._active_file_count -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def connection(self) -> Iterator[None]:
+        '''Holds one connection of the budget'''
+        with self._condition:
+            while self._connections_in_use >= self.max_connections:
+                self._condition.wait()
+            self._connections_in_use += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._connections_in_use -= 1
+                self._condition.notify_all()
+
+    def _get_fair_share(self, max_fragments: Optional[int]) -> int:
+        free_connections = self.max_connections - self._connections_in_use
+        fair_share = max(self.max_connections // self.file_slots, 1)
+        return max(min(fair_share, free_connections, max_fragments or fair_share), 1)
+
+    def consume(self, byte_count: int) -> None:
+        '''Records the transferred bytes, sleeping as long as the bandwidth budget is exceeded'''
+        with self._condition:
+            self._transferred_bytes += byte_count
+            if not self.max_bandwidth:
+                return
+            now = time.monotonic()
+            self._bandwidth_allowance = min(
+                self._bandwidth_allowance + (now - self._bandwidth_updated_at) * self.max_bandwidth,
+                float(self.max_bandwidth),
+            )
+            self._bandwidth_updated_at = now
+            self._bandwidth_allowance -= byte_count
+            wait_seconds = -self._bandwidth_allowance / self.max_bandwidth if self._bandwidth_allowance < 0 else 0
+        if wait_seconds:
+            time.sleep(wait_seconds)
+
+    def snapshot(self) -> dict[str, float]:
+        with self._condition:
+            elapsed_seconds = max(time.monotonic() - self._started_at, 1e-9)
+            return {
+                'connections_in_use': self._connections_in_use,
+                'max_connections': self.max_connections,
+                'active_files': self._active_file_count,
+                'waiting_files': self._waiting_file_count,
+                'transferred_bytes': self._transferred_bytes,
+                'average_bytes_per_second': self._transferred_bytes / elapsed_seconds,
+            }
+
+    def describe(self) -> str:
+        snapshot = self.snapshot()
+        return (f"{snapshot['connections_in_use']:.0f}/{snapshot['max_connections']:.0f} connections, "
+                f"{snapshot['active_files']:.0f} files")
@@ -1,9 +1,11 @@
 from enum import Enum
 from http.cookiejar import CookieJar
-from typing import Callable, Optional, cast
+from typing import Callable, Iterable, Optional, cast
 
 import browser_cookie3
 
+TWITTER_COOKIE_DOMAINS = ('twitter.com', 'x.com')
+
 
 class SupportedBrowser(Enum):
     '''Supported browsers for cookie extraction.'''
@@ -18,40 +20,48 @@ class SupportedBrowser(Enum):
     SAFARI = 'safari'
 
 
-def get_cookie_loader(browser_name: Optional[SupportedBrowser]) -> Callable[[None], CookieJar]:
+def get_cookie_loader(browser_name: Optional[SupportedBrowser]) -> Callable[[str], CookieJar]:
 
-    def wrapper() -> CookieJar:
+    def wrapper(domain_name: str = '') -> CookieJar:
+        '''`domain_name` is pushed down to the cookie store, so only the matching cookies are decrypted'''
         if browser_name == SupportedBrowser.CHROME:
-            return browser_cookie3.chrome()
+            return browser_cookie3.chrome(domain_name=domain_name)
         if browser_name == SupportedBrowser.FIREFOX:
-            return browser_cookie3.firefox()
+            return browser_cookie3.firefox(domain_name=domain_name)
         if browser_name == SupportedBrowser.OPERA:
-            return browser_cookie3.opera()
+            return browser_cookie3.opera(domain_name=domain_name)
         if browser_name == SupportedBrowser.OPERA_GX:
-            return browser_cookie3.opera_gx()
+            return browser_cookie3.opera_gx(domain_name=domain_name)
         if browser_name == SupportedBrowser.EDGE:
-            return browser_cookie3.edge()
+            return browser_cookie3.edge(domain_name=domain_name)
         if browser_name == SupportedBrowser.CHROMIUM:
-            return browser_cookie3.chromium()
+            return browser_cookie3.chromium(domain_name=domain_name)
         if browser_name == SupportedBrowser.BRAVE:
-            return browser_cookie3.brave()
+            return browser_cookie3.brave(domain_name=domain_name)
         if browser_name == SupportedBrowser.VIVALDI:
-            return browser_cookie3.vivaldi()
+            return browser_cookie3.vivaldi(domain_name=domain_name)
         if browser_name == SupportedBrowser.SAFARI:
-            return browser_cookie3.safari()
-        return browser_cookie3.load()
+            return browser_cookie3.safari(domain_name=domain_name)
+        return browser_cookie3.load(domain_name=domain_name)
 
     return wrapper
 
 
-def load_cookies(browser_name: Optional[SupportedBrowser] = None, domain: str = '') -> CookieJar:
+def is_cookie_of_domains(cookie_domain: str, domains: Iterable[str]) -> bool:
+    '''Whether the cookie domain is one of the domains or their subdomain; `netflix.com` is not of `x.com`'''
+    host = cookie_domain.lstrip('.')
+    return any(host == domain or host.endswith(f'.{domain}') for domain in domains)
+
+
+def load_cookies(browser_name: Optional[SupportedBrowser] = None, domains: Iterable[str] = ()) -> CookieJar:
     cookie_loader = get_cookie_loader(browser_name=browser_name)
-    all_cookies = cast(CookieJar, cookie_loader())
-    if not domain:
-        return all_cookies
+    if not domains:
+        return cast(CookieJar, cookie_loader(''))
 
     filtered_jar = CookieJar()
-    for cookie in all_cookies:
-        if cookie.domain.endswith(f'{domain}'):
-            filtered_jar.set_cookie(cookie)
+    for domain in domains:
+        # the cookie store matches the domain name as a substring, so the domain is checked again
+        for cookie in cast(CookieJar, cookie_loader(domain)):
+            if is_cookie_of_domains(cookie.domain, (domain, )):
+                filtered_jar.set_cookie(cookie)
     return filtered_jar
@@ -0,0 +1,19 @@
+import re
+from urllib.parse import urlparse
+
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font'})
+VIDEO_SEGMENT_PATTERN = re.compile(r'\.(m4s|ts|mp4|aac)$')
+
+
+def should_block_request(url: str, resource_type: str) -> bool:
+    '''Whether the request is useless while crawling the timelines
+
+    Images, fonts and the segments of autoplaying videos are blocked,
+    but the m3u8 playlists pass since `TwitterParser.get_video_of_tweet` captures them.
+    '''
+    path = urlparse(url).path
+    if path.endswith('.m3u8'):
+        return False
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    return VIDEO_SEGMENT_PATTERN.search(path) is not None  # segments are fetched by the player's xhr
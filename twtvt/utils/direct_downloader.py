@@ -0,0 +1,277 @@
+import os
+import re
+import shutil
+import subprocess
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext, suppress
+from dataclasses import dataclass
+from types import TracebackType
+from typing import ContextManager, Iterator, Optional
+from urllib.parse import urljoin
+
+import httpx
+
+from twtvt.utils.connection_budget import ConnectionBudget
+
+ATTRIBUTE_PATTERN = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class DirectDownloadError(Exception):
+    '''The video can not be downloaded directly; the caller falls back to yt-dlp'''
+    status_code: Optional[int]  # of the failed HTTP response, if any
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass(frozen=True)
+class HLSVariant:
+    uri: str
+    bandwidth: int
+    height: int
+    audio_group: Optional[str]
+
+
+@dataclass(frozen=True)
+class HLSMediaPlaylist:
+    init_uri: Optional[str]
+    segment_uris: list[str]
+
+
+@contextmanager
+def _download_errors_as_direct_download_error() -> Iterator[None]:
+    '''Any failure of the direct download lets the caller fall back to yt-dlp'''
+    try:
+        yield
+    except httpx.HTTPStatusError as error:
+        raise DirectDownloadError(f'{type(error).__name__}: {error}', error.response.status_code) from error
+    except (httpx.HTTPError, subprocess.CalledProcessError, OSError) as error:
+        raise DirectDownloadError(f'{type(error).__name__}: {error}') from error
+
+
+@contextmanager
+def _removed_on_error(path: str) -> Iterator[None]:
+    '''Removes the partially written file or directory if writing it fails
+    An interrupted run keeps them, to be resumed by `--resume`
+    '''
+    try:
+        yield
+    except Exception:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        with suppress(FileNotFoundError, IsADirectoryError):
+            os.remove(path)
+        raise
+
+
+def _read_progress(progress_path: str) -> tuple[int, int]:
+    '''Returns the count and the total size of the segments written to the partial file'''
+    try:
+        with open(progress_path, 'r') as f:
+            segment_count, size = f.read().split()
+            return int(segment_count), int(size)
+    except (OSError, ValueError):  # missing, or cut off by a crash
+        return 0, 0
+
+
+def _parse_attributes(line: str) -> dict[str, str]:
+    return {key: value.strip('"') for key, value in ATTRIBUTE_PATTERN.findall(line.split(':', 1)[1])}
+
+
+def parse_master_playlist(text: str, base_url: str) -> tuple[list[HLSVariant], dict[str, str]]:
+    '''Returns the variants and the audio rendition uri of each audio group'''
+    variants: list[HLSVariant] = []
+    audio_uris: dict[str, str] = {}
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for index, line in enumerate(lines):
+        if line.startswith('#EXT-X-MEDIA:'):
+            attributes = _parse_attributes(line)
+            if attributes.get('TYPE') == 'AUDIO' and 'URI' in attributes:
+                audio_uris.setdefault(attributes['GROUP-ID'], urljoin(base_url, attributes['URI']))
+        elif line.startswith('#EXT-X-STREAM-INF:') and index + 1 < len(lines):
+            attributes = _parse_attributes(line)
+            resolution = attributes.get('RESOLUTION', '0x0').split('x')
+            variants.append(
+                HLSVariant(
+                    uri=urljoin(base_url, lines[index + 1]),
+                    bandwidth=int(attributes.get('BANDWIDTH', 0)),
+                    height=int(resolution[-1] or 0),
+                    audio_group=attributes.get('AUDIO'),
+                ))
+    return variants, audio_uris
+
+
+def parse_media_playlist(text: str, base_url: str) -> HLSMediaPlaylist:
+    init_uri: Optional[str] = None
+    segment_uris: list[str] = []
+    for line in (line.strip() for line in text.splitlines()):
+        if line.startswith('#EXT-X-KEY:') and _parse_attributes(line).get('METHOD', 'NONE') != 'NONE':
+            raise DirectDownloadError('Encrypted HLS playlists are not supported.')
+        if line.startswith('#EXT-X-MAP:'):
+            init_uri = urljoin(base_url, _parse_attributes(line)['URI'])
+        elif line and not line.startswith('#'):
+            segment_uris.append(urljoin(base_url, line))
+    return HLSMediaPlaylist(init_uri=init_uri, segment_uris=segment_uris)
+
+
+class DirectDownloader:
+    '''Downloads video files and HLS playlists over one pooled HTTP client, without yt-dlp
+
+    The segments of a playlist are fetched in parallel, at most `max_concurrent_segments` per file,
+    and written to the output file in order.
+    Every request holds a connection of the `connection_budget` while it runs, when given.
+    '''
+    client: httpx.Client
+    max_concurrent_segments: int
+    connection_budget: Optional[ConnectionBudget]
+
+    def __init__(
+        self,
+        client: Optional[httpx.Client] = None,
+        max_concurrent_segments: int = 8,
+        connection_budget: Optional[ConnectionBudget] = None,
+    ):
+        self.client = client or httpx.Client(
+            follow_redirects=True,
+            timeout=httpx.Timeout(30),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+        self.max_concurrent_segments = max_concurrent_segments
+        self.connection_budget = connection_budget
+
+    def download_hls(self, playlist_url: str, output_path: str, max_height: Optional[int] = None) -> str:
+        '''Downloads the best variant of the playlist(not higher than `max_height`) to the output path
+        Raises `DirectDownloadError` on any failure, leaving no partial file behind
+        '''
+        with _download_errors_as_direct_download_error():
+            return self._download_hls(playlist_url, output_path, max_height)
+
+    def _download_hls(self, playlist_url: str, output_path: str, max_height: Optional[int]) -> str:
+        playlist_text = self._get(playlist_url).decode()
+        if '#EXT-X-STREAM-INF' not in playlist_text:
+            self._download_media_playlist(parse_media_playlist(playlist_text, playlist_url), output_path)
+            return output_path
+
+        variants, audio_uris = parse_master_playlist(playlist_text, playlist_url)
+        variants = [variant for variant in variants if max_height is None or variant.height <= max_height]
+        if not variants:
+            raise DirectDownloadError(f'No variant to download in {playlist_url}')
+        variant = max(variants, key=lambda variant: variant.bandwidth)
+
+        video_playlist = parse_media_playlist(self._get(variant.uri).decode(), variant.uri)
+        audio_uri = audio_uris.get(variant.audio_group or '')
+        if not audio_uri:
+            self._download_media_playlist(video_playlist, output_path)
+            return output_path
+
+        # twitter serves the audio as a separate rendition, which needs to be muxed with the video
+        ffmpeg_path = shutil.which('ffmpeg')
+        if not ffmpeg_path:
+            raise DirectDownloadError('ffmpeg is required to merge the separate audio of the video.')
+        audio_playlist = parse_media_playlist(self._get(audio_uri).decode(), audio_uri)
+        directory = f'{output_path}.parts'  # kept by an interrupted run, to resume the video and the audio
+        with _removed_on_error(directory):
+            os.makedirs(directory, exist_ok=True)
+            video_path = os.path.join(directory, 'video.mp4')
+            audio_path = os.path.join(directory, 'audio.mp4')
+            if not os.path.exists(video_path):
+                self._download_media_playlist(video_playlist, video_path)
+            if not os.path.exists(audio_path):
+                self._download_media_playlist(audio_playlist, audio_path)
+            self._mux(ffmpeg_path, video_path, audio_path, output_path)
+        shutil.rmtree(directory)
+        return output_path
+
+    def download_file(self, url: str, output_path: str, chunk_size: int = 1024 * 1024) -> str:
+        '''Streams the file of the url to the output path, resuming the partial file of an interrupted run
+        Raises `DirectDownloadError` on any failure, leaving no partial file behind
+        '''
+        part_path = f'{output_path}.part'
+        with _download_errors_as_direct_download_error(), _removed_on_error(part_path):
+            resumed_size = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {'Range': f'bytes={resumed_size}-'} if resumed_size else {}
+            with self._hold_connection(), self.client.stream('GET', url, headers=headers) as response:
+                self._raise_for_status(response)
+                # the server may ignore the range, sending the whole file again
+                with open(part_path, 'ab' if response.status_code == 206 else 'wb') as f:
+                    for chunk in response.iter_bytes(chunk_size):
+                        f.write(chunk)
+                        self._consume_bandwidth(len(chunk))
+            os.replace(part_path, output_path)
+        return output_path
+
+    def _download_media_playlist(self, playlist: HLSMediaPlaylist, output_path: str) -> None:
+        part_path = f'{output_path}.part'
+        progress_path = f'{part_path}.progress'  # the segments in the partial file, to resume it after a crash
+        segment_uris = [playlist.init_uri, *playlist.segment_uris] if playlist.init_uri else playlist.segment_uris
+        written_count, written_size = _read_progress(progress_path) if os.path.exists(part_path) else (0, 0)
+        with _removed_on_error(part_path), _removed_on_error(progress_path), \
+                ThreadPoolExecutor(self.max_concurrent_segments) as executor:
+            with open(part_path, 'r+b' if written_count else 'wb') as f:
+                f.truncate(written_size)  # drops the segment being written when the run was interrupted
+                f.seek(written_size)
+
+                def write_segment(segment: bytes):
+                    nonlocal written_count
+                    f.write(segment)
+                    f.flush()
+                    written_count += 1
+                    with open(progress_path, 'w') as progress_file:
+                        progress_file.write(f'{written_count} {f.tell()}')
+
+                # keeps at most `max_concurrent_segments` segments in flight, writing them in order
+                pending_segments: deque[Future[bytes]] = deque()
+                try:
+                    for segment_uri in segment_uris[written_count:]:
+                        pending_segments.append(executor.submit(self._get, segment_uri))
+                        if len(pending_segments) >= self.max_concurrent_segments:
+                            write_segment(pending_segments.popleft().result())
+                    while pending_segments:
+                        write_segment(pending_segments.popleft().result())
+                finally:
+                    for pending_segment in pending_segments:  # a segment failed, the rest is not needed anymore
+                        pending_segment.cancel()
+            os.replace(part_path, output_path)
+            os.remove(progress_path)
+
+    def _get(self, url: str) -> bytes:
+        with self._hold_connection():
+            response = self.client.get(url)
+            self._raise_for_status(response)
+            self._consume_bandwidth(len(response.content))
+            return response.content
+
+    def _hold_connection(self) -> ContextManager[None]:
+        return self.connection_budget.connection() if self.connection_budget else nullcontext()
+
+    def _consume_bandwidth(self, byte_count: int) -> None:
+        if self.connection_budget:
+            self.connection_budget.consume(byte_count)
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response) -> None:
+        if response.status_code == 404 or response.status_code == 403:
+            raise DirectDownloadError(f'{response.status_code} for {response.url}', response.status_code)
+        response.raise_for_status()
+
+    @staticmethod
+    def _mux(ffmpeg_path: str, video_path: str, audio_path: str, output_path: str) -> None:
+        command = [ffmpeg_path, '-y', '-loglevel', 'error', '-i', video_path, '-i', audio_path, '-c', 'copy']
+        with _removed_on_error(output_path):
+            subprocess.run([*command, output_path], check=True, capture_output=True)
+
+    def close(self) -> None:
+        self.client.close()
+
+    def __enter__(self) -> 'DirectDownloader':
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
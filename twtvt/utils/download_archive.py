@@ -0,0 +1,112 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from types import TracebackType
+from typing import Optional
+
+from .uri_validator import URIValidator
+
+
+class DownloadArchive:
+    '''On-disk index of downloaded videos, keyed by tweet(status) ID and media ID.
+
+    Reruns consult the archive before scheduling a link, so videos already on disk never reach yt-dlp again.
+    Links which failed permanently(deleted, protected, no video) are recorded as well, to be skipped at once.
+    '''
+    DEFAULT_FILE_NAME = '.twtvt-archive.sqlite3'
+    STATUS_ID_PATTERN = re.compile(r'/status/(\d+)')
+
+    path: str
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('''
+                CREATE TABLE IF NOT EXISTS downloads (
+                    status_id TEXT NOT NULL,
+                    media_id TEXT NOT NULL DEFAULT '',
+                    link TEXT NOT NULL,
+                    file_path TEXT,
+                    downloaded_at INTEGER NOT NULL,
+                    PRIMARY KEY (status_id, media_id)
+                )
+            ''')
+            self._connection.execute('''
+                CREATE TABLE IF NOT EXISTS failures (
+                    status_id TEXT PRIMARY KEY,
+                    link TEXT NOT NULL,
+                    reason TEXT NOT NULL,
+                    failed_at INTEGER NOT NULL
+                )
+            ''')
+
+    @classmethod
+    def in_directory(cls, directory: str) -> 'DownloadArchive':
+        return cls(os.path.join(directory, cls.DEFAULT_FILE_NAME))
+
+    @classmethod
+    def get_key(cls, link: str) -> str:
+        '''Returns the archive key of the link; the status ID for tweets, the link itself otherwise.'''
+        if URIValidator.is_twitter_link(link):
+            matched = cls.STATUS_ID_PATTERN.search(link)
+            if matched:
+                return matched.group(1)
+        return link.split('?')[0].rstrip('/')
+
+    def contains(self, link: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT 1 FROM downloads WHERE status_id = ? LIMIT 1',
+                (self.get_key(link), ),
+            ).fetchone()
+        return row is not None
+
+    def add(self, link: str, media_ids: tuple[str, ...] = ('', ), file_paths: tuple[Optional[str], ...] = ()) -> None:
+        '''Records the downloaded media of the link in a single transaction.'''
+        status_id = self.get_key(link)
+        downloaded_at = int(time.time())
+        rows = [(status_id, media_id, link, file_paths[index] if index < len(file_paths) else None, downloaded_at)
+                for index, media_id in enumerate(media_ids)]
+        with self._lock, self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?)', rows)
+            self._connection.execute('DELETE FROM failures WHERE status_id = ?', (status_id, ))
+
+    def get_failure_reason(self, link: str) -> Optional[str]:
+        '''Returns why the link failed permanently, or None if it did not'''
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT reason FROM failures WHERE status_id = ?',
+                (self.get_key(link), ),
+            ).fetchone()
+        return row[0] if row else None
+
+    def add_failure(self, link: str, reason: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?)',
+                (self.get_key(link), link, reason, int(time.time())),
+            )
+
+    def remove_failure(self, link: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM failures WHERE status_id = ?', (self.get_key(link), ))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> 'DownloadArchive':
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -1,20 +1,70 @@
+import itertools
 import logging
+import os
+import threading
 import time
-from multiprocessing import cpu_count as get_cpu_count
-from typing import Any, Iterable, Optional
+from dataclasses import dataclass, field
+from http.cookiejar import CookieJar
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional
 
 import yt_dlp
-from playwright.sync_api import sync_playwright
+from playwright.async_api import BrowserContext, async_playwright
 from rich.progress import Progress
-from tenacity import after_log, before_sleep_log, retry, stop_after_attempt, wait_fixed
+from tenacity import after_log, before_sleep_log, retry
 
-from twtvt.utils.cookie_parser import SupportedBrowser, load_cookies
-from twtvt.utils.execute_parallel import execute_parallel
+from twtvt.utils.async_twitter_parser import AsyncTwitterParser
+from twtvt.utils.connection_budget import ConnectionBudget
+from twtvt.utils.cookie_parser import TWITTER_COOKIE_DOMAINS, SupportedBrowser, load_cookies
+from twtvt.utils.direct_downloader import DirectDownloader, DirectDownloadError
+from twtvt.utils.download_archive import DownloadArchive
+from twtvt.utils.execute_parallel import execute_parallel, get_parallel_worker_count, iter_async
+from twtvt.utils.job_journal import JobJournal, JournalState
+from twtvt.utils.job_queue import JobQueue, WorkerRole
+from twtvt.utils.link_feed import LinkFeed
+from twtvt.utils.link_normalizer import normalize_link
+from twtvt.utils.rate_limit_coordinator import RateLimitCoordinator
+from twtvt.utils.retry_policy import ErrorClass, RetryPolicy, classify_error
+from twtvt.utils.scrape_engine import crawl_video_links
+from twtvt.utils.scroll_policy import ScrollPolicy
+from twtvt.utils.session_cache import SessionCache
+from twtvt.utils.spilling_link_set import SpillingLinkSet
+from twtvt.utils.timeline_crawler import to_playwright_cookies
+from twtvt.utils.timeline_response_parser import TimelineMedia, TimelineTweet
+from twtvt.utils.youtube_dl_pool import YoutubeDLPool
 
 from .logger import logger
-from .twitter_parser import TwitterParser
 from .uri_validator import URIValidator
 
+DOWNLOAD_RETRY_POLICY = RetryPolicy()
+
+
+@dataclass
+class _DownloadSettings:
+    output: str
+    cookies_from_browser: Optional[str]
+    connection_budget: ConnectionBudget = field(default_factory=ConnectionBudget)  # shared by every download
+    rate_limit_coordinator: RateLimitCoordinator = field(default_factory=RateLimitCoordinator)
+    archive: Optional[DownloadArchive] = None
+    journal: Optional[JobJournal] = None
+    job_queue: Optional[JobQueue] = None  # shared with the other processes, if any
+    direct_downloader: Optional[DirectDownloader] = None
+    timeline_tweets: dict[str, TimelineTweet] = field(default_factory=dict)  # filled while crawling
+    youtube_dl_pool: YoutubeDLPool = field(init=False)  # a `YoutubeDL` reused by each worker
+
+    def __post_init__(self):
+        self.youtube_dl_pool = YoutubeDLPool(lambda: _get_ydl_opts(self))
+
+    def close(self) -> None:
+        self.youtube_dl_pool.close()
+        if self.journal:
+            self.journal.close()
+        if self.job_queue:
+            self.job_queue.close()
+        if self.archive:
+            self.archive.close()
+        if self.direct_downloader:
+            self.direct_downloader.close()
+
 
 def download_video(
     target_uris: list[str],
@@ -25,25 +75,127 @@ def download_video(
     cookies_from_browser: Optional[str] = None,
     debug: bool = False,
     parallel: bool = False,
+    archive: Optional[str] = None,
+    use_archive: bool = True,
+    capture_responses: bool = False,
+    limit: Optional[int] = None,
+    scroll_policy: ScrollPolicy = ScrollPolicy(),
+    scrape_concurrency: int = 1,
+    block_resources: bool = True,
+    use_session_cache: bool = True,
+    direct_download: bool = True,
+    segment_concurrency: int = 8,
+    max_connections: int = ConnectionBudget.DEFAULT_MAX_CONNECTIONS,
+    max_bandwidth: Optional[int] = None,
+    retry_failed: bool = False,
+    workers: Optional[int] = None,
+    resume: Optional[str] = None,
+    queue: Optional[str] = None,
+    role: WorkerRole = WorkerRole.ALL,
 ):
+    '''Downloads the videos of the targets, journaling the run in the output path
+    With `resume`, the path of the journal of an interrupted run, the run continues where it stopped
+    With `queue`, the path of a job queue shared by several processes, the run scrapes the targets into the queue
+    and downloads the queued links as the `role` says
+    '''
+    if role is not WorkerRole.ALL and not queue:
+        raise ValueError(f'The {role.value} role needs a job queue shared with the other roles.')
+    resumed_state = JobJournal.replay(resume) if resume else JournalState()
+    target_uris = target_uris or resumed_state.target_uris
     supported_browser = SupportedBrowser(cookies_from_browser.lower()) if cookies_from_browser else None
     _validate_target_uris(target_uris=target_uris)
-    video_links: tuple[str] = (
-        *_extract_from_file_paths(target_uris=target_uris),
-        *_extract_from_twitter_links(
-            target_uris=target_uris,
-            username=username,
-            password=password,
-            cookies_from_browser=supported_browser,
-            until_link=until_link,
-            debug=debug,
-        ),
+    _validate_twitter_credentials(
+        target_uris=target_uris,
+        username=username,
+        password=password,
+        cookies_from_browser=supported_browser,
     )
-    _backup_links(links=video_links, output=output)
-    if parallel:
-        _download_videos_parallel(video_links=video_links, output=output, cookies_from_browser=cookies_from_browser)
-    else:
-        _download_videos(video_links=video_links, output=output, cookies_from_browser=cookies_from_browser)
+
+    worker_count = (workers or get_parallel_worker_count()) if parallel else 1
+    connection_budget = ConnectionBudget(
+        max_connections=max_connections,
+        max_bandwidth=max_bandwidth,
+        file_slots=worker_count,  # the files downloaded at the same time
+    )
+    journal = JobJournal(resume) if resume else JobJournal.in_directory(output, target_uris)
+    settings = _DownloadSettings(
+        output=output,
+        cookies_from_browser=cookies_from_browser,
+        connection_budget=connection_budget,
+        archive=_open_archive(output=output, archive=archive, use_archive=use_archive),
+        journal=journal,
+        job_queue=JobQueue(queue) if queue else None,
+        direct_downloader=DirectDownloader(
+            max_concurrent_segments=segment_concurrency,
+            connection_budget=connection_budget,
+        ) if direct_download else None,
+    )
+    logger.info(f'Journaling the run to {journal.path}. Resume it with --resume {journal.path}')
+    if resumed_state.discovered_links:
+        logger.info(f'Resuming {len(resumed_state.pending_links)} videos not downloaded yet.')
+    known_links = SpillingLinkSet(resumed_state.discovered_links)
+    try:
+        is_crawled = resumed_state.is_crawled or role is WorkerRole.DOWNLOAD
+        extracted_links: Iterable[str] = () if is_crawled else itertools.chain(
+            _extract_from_file_paths(target_uris=target_uris),
+            _extract_from_twitter_links(
+                target_uris=target_uris,
+                username=username,
+                password=password,
+                cookies_from_browser=supported_browser,
+                until_link=until_link,
+                debug=debug,
+                capture_responses=capture_responses,
+                limit=limit,
+                scroll_policy=scroll_policy,
+                concurrency=scrape_concurrency,
+                block_resources=block_resources,
+                use_session_cache=use_session_cache,
+                # the captured tweets are only needed to download them directly
+                timeline_tweets=settings.timeline_tweets if direct_download else None,
+            ),
+        )
+        discovered_links = _journal_discovered_links(
+            links=extracted_links,
+            journal=journal,
+            known_links=known_links,
+        )
+        # the links an interrupted run discovered but did not download come first
+        pending_links: Iterable[str] = itertools.chain(resumed_state.pending_links, discovered_links)
+        if role is not WorkerRole.DOWNLOAD:
+            pending_links = _backup_links(links=pending_links, output=output)
+        video_links = _skip_archived_links(
+            video_links=pending_links,
+            archive=settings.archive,
+            retry_failed=retry_failed,
+        )
+        if settings.job_queue:
+            job_queue = settings.job_queue
+            if role is not WorkerRole.DOWNLOAD:
+                job_queue.register_producer()  # before the workers may find the queue drained
+                if role is WorkerRole.SCRAPE:
+                    _queue_links(job_queue, video_links)
+                    return
+                threading.Thread(
+                    target=_queue_links,
+                    args=(job_queue, video_links),
+                    name='twtvt-queue',
+                    daemon=True,
+                ).start()
+            # leases only as many links as the workers download, the other processes take the rest
+            link_feed = LinkFeed(_lease_queued_links(job_queue, settings.archive, retry_failed), max_size=worker_count)
+        else:
+            link_feed = LinkFeed(video_links)
+        link_feed.start()  # scraping keeps going while the videos are downloaded
+        if parallel:
+            _download_videos_parallel(link_feed=link_feed, settings=settings, workers=worker_count)
+        else:
+            _download_videos(link_feed=link_feed, settings=settings)
+        logger.debug(f'Connection budget: {connection_budget.snapshot()}')
+        logger.info(f'yt-dlp overhead: {settings.youtube_dl_pool.get_stats().describe()}')
+    finally:
+        known_links.close()
+        settings.close()
 
 
 def _validate_target_uris(target_uris: list[str]):
@@ -53,6 +205,18 @@ def _validate_target_uris(target_uris: list[str]):
             raise ValueError(f'Invalid target_uri: {target_uri}')
 
 
+def _validate_twitter_credentials(
+    target_uris: Iterable[str],
+    username: Optional[str],
+    password: Optional[str],
+    cookies_from_browser: Optional[SupportedBrowser],
+):
+    if not any(URIValidator.is_twitter_link(target_uri) for target_uri in target_uris):
+        return
+    if (not username or not password) and not cookies_from_browser:
+        raise ValueError('Username and password, or cookies_from_browser is required for twitter links.')
+
+
 def _extract_from_twitter_links(
     target_uris: Iterable[str],
     username: Optional[str],
@@ -60,122 +224,387 @@ def _extract_from_twitter_links(
     cookies_from_browser: Optional[SupportedBrowser],
     until_link: Optional[str],
     debug: bool,
-) -> list[str]:
+    capture_responses: bool = False,
+    limit: Optional[int] = None,
+    scroll_policy: ScrollPolicy = ScrollPolicy(),
+    concurrency: int = 1,
+    block_resources: bool = True,
+    use_session_cache: bool = True,
+    timeline_tweets: Optional[dict[str, TimelineTweet]] = None,
+) -> Iterator[str]:
     twitter_target_links = [target_uri for target_uri in target_uris if URIValidator.is_twitter_link(target_uri)]
     if not twitter_target_links:
-        return []
-    if (not username or not password) and not cookies_from_browser:
-        raise ValueError('Username and password, or cookies_from_browser is required for twitter links.')
+        return
 
-    cookiejar = load_cookies(browser_name=cookies_from_browser, domain='twitter.com')
+    yield from iter_async(
+        _crawl_twitter_links(
+            twitter_target_links=twitter_target_links,
+            cookies_from_browser=cookies_from_browser,
+            username=username,
+            password=password,
+            until_link=until_link,
+            debug=debug,
+            capture_responses=capture_responses,
+            limit=limit,
+            scroll_policy=scroll_policy,
+            concurrency=concurrency,
+            block_resources=block_resources,
+            use_session_cache=use_session_cache,
+            timeline_tweets=timeline_tweets,
+        ))
 
-    twitter_video_links = []
-    with sync_playwright() as playwright_sync:
-        # load browser
-        browser = playwright_sync.webkit.launch(headless=not debug)
-        page = browser.new_page()
 
-        # load parser
-        twitter_parser = TwitterParser(page)
-        if cookiejar:
-            twitter_parser.login_with_cookiejar(cookiejar)
-        elif username and password:
-            twitter_parser.login(username, password)
+async def _crawl_twitter_links(
+    twitter_target_links: list[str],
+    cookies_from_browser: Optional[SupportedBrowser],
+    username: Optional[str],
+    password: Optional[str],
+    until_link: Optional[str],
+    debug: bool,
+    capture_responses: bool,
+    limit: Optional[int],
+    scroll_policy: ScrollPolicy,
+    concurrency: int,
+    block_resources: bool,
+    use_session_cache: bool,
+    timeline_tweets: Optional[dict[str, TimelineTweet]],
+) -> AsyncIterator[str]:
+    async with async_playwright() as playwright_async:
+        # load browser, every page shares the logged-in context
+        browser = await playwright_async.webkit.launch(headless=not debug)
+        session_cache = _get_session_cache(username, cookies_from_browser) if use_session_cache else None
+        storage_state = session_cache.load() if session_cache else None
+        context = await browser.new_context(storage_state=storage_state)  # type: ignore
+
+        # login
+        if storage_state and await _is_logged_in(context):
+            logger.info('Reusing the cached login session.')
         else:
-            raise ValueError('Username and password, or cookies_from_browser is required for twitter links.')
+            if storage_state and session_cache:
+                logger.info('The cached login session is not valid anymore. Logging in again...')
+                session_cache.clear()
+                await context.close()
+                context = await browser.new_context()
+            await _login(context, cookies_from_browser=cookies_from_browser, username=username, password=password)
+            if not await _is_logged_in(context):
+                raise ValueError('Login failed; the home timeline is not shown for the given credentials.')
+            if session_cache:
+                session_cache.save(dict(await context.storage_state()))
 
         # extract video links
-        for target_link in twitter_target_links:
-            logger.info(f'Extracting video links from {target_link}')
-            if URIValidator.is_media_link(target_link):
-                target_username = target_link.split('/')[3]
-                twitter_video_links.extend(
-                    twitter_parser.get_media_video_tweets_until(target_username, until_link or ''))
-            elif URIValidator.is_liked_link(target_link):
-                target_username = target_link.split('/')[3]
-                twitter_video_links.extend(
-                    twitter_parser.get_liked_video_tweets_until(target_username, until_link or ''))
-            else:
-                twitter_video_links.append(target_link)
-    return twitter_video_links
-
-
-def _extract_from_file_paths(target_uris: Iterable[str]) -> list[str]:
-    video_links = []
+        async for link in crawl_video_links(
+                context,
+                twitter_target_links,
+                concurrency=concurrency,
+                until_link=until_link,
+                limit=limit,
+                capture_responses=capture_responses,
+                scroll_policy=scroll_policy,
+                block_resources=block_resources,
+                timeline_tweets=timeline_tweets,
+        ):
+            yield link
+
+
+async def _login(
+    context: BrowserContext,
+    cookies_from_browser: Optional[SupportedBrowser],
+    username: Optional[str],
+    password: Optional[str],
+):
+    cookiejar = CookieJar()
+    if cookies_from_browser:
+        cookiejar = load_cookies(browser_name=cookies_from_browser, domains=TWITTER_COOKIE_DOMAINS)
+
+    if cookiejar:
+        logger.info('Logging in by cookies...')
+        await context.add_cookies(to_playwright_cookies(cookiejar))  # type: ignore
+    elif username and password:
+        login_page = await context.new_page()
+        await AsyncTwitterParser(login_page).login(username, password)
+        await login_page.close()
+    else:
+        raise ValueError('Username and password, or cookies_from_browser is required for twitter links.')
+
+
+async def _is_logged_in(context: BrowserContext) -> bool:
+    page = await context.new_page()
+    try:
+        return await AsyncTwitterParser(page).is_logged_in()
+    finally:
+        await page.close()
+
+
+def _get_session_cache(username: Optional[str], cookies_from_browser: Optional[SupportedBrowser]) -> SessionCache:
+    if cookies_from_browser:
+        return SessionCache.for_identity(f'browser-{cookies_from_browser.value}')
+    return SessionCache.for_identity(f'user-{username}')
+
+
+def _extract_from_file_paths(target_uris: Iterable[str]) -> Iterator[str]:
     file_paths = [target_uri for target_uri in target_uris if URIValidator.is_file_path(target_uri)]
     for file_path in file_paths:
         logger.info(f'Extracting video links from {file_path}')
+        invalid_line_count = 0
         with open(file_path, 'r') as f:
-            links_in_file = f.read().splitlines()
-            video_links.extend(links_in_file)
+            for line in f:  # read lazily, the files may have millions of lines
+                link = normalize_link(line)
+                if link:
+                    yield link
+                elif line.strip() and not line.lstrip().startswith('#'):
+                    invalid_line_count += 1
+        if invalid_line_count:
+            logger.warning(f'Skipped {invalid_line_count} lines without a video link in {file_path}')
+
+
+def _backup_links(links: Iterable[str], output: str) -> Iterator[str]:
+    '''Writes the links to the backup file as they pass through'''
+    started_at = int(time.time())
+    backup_path = f'{output}/links-{started_at}.txt'
+    count = 0
+    with open(backup_path, 'w') as f:
+        for link in links:
+            f.write(f'{link}\n')
+            f.flush()
+            count += 1
+            yield link
+    os.replace(backup_path, f'{output}/links-{started_at}-{count}_videos.txt')
+
+
+def _journal_discovered_links(links: Iterable[str], journal: JobJournal,
+                              known_links: SpillingLinkSet) -> Iterator[str]:
+    '''Records the links in the journal as they are discovered, skipping the duplicated and the known ones'''
+    for link in links:
+        if not known_links.add_new(link):
+            continue
+        journal.record_discovered(link)
+        yield link
+    journal.record_crawled()
 
-    return video_links
 
+def _open_archive(output: str, archive: Optional[str], use_archive: bool) -> Optional[DownloadArchive]:
+    if not use_archive:
+        return None
+    return DownloadArchive(archive) if archive else DownloadArchive.in_directory(output)
 
-def _backup_links(links: tuple[str], output: str):
-    with open(f'{output}/links-{int(time.time())}-{len(links)}_videos.txt', 'w') as f:
-        f.write('\n'.join(links))
 
+def _skip_archived_links(
+    video_links: Iterable[str],
+    archive: Optional[DownloadArchive],
+    retry_failed: bool = False,
+) -> Iterator[str]:
+    '''Skips the downloaded links, and the links failed permanently unless `retry_failed` is set'''
+    if not archive:
+        yield from video_links
+        return
+    skipped_count = 0
+    skipped_failure_count = 0
+    for video_link in video_links:
+        if archive.contains(video_link):
+            skipped_count += 1
+            continue
+        if not retry_failed and archive.get_failure_reason(video_link) is not None:
+            skipped_failure_count += 1
+            continue
+        yield video_link
+    if skipped_count:
+        logger.info(f'Skipped {skipped_count} videos already in the download archive.')
+    if skipped_failure_count:
+        logger.info(f'Skipped {skipped_failure_count} videos failed permanently before. Use --retry-failed to retry.')
 
-def _download_videos(video_links: tuple[str], output: str, cookies_from_browser: Optional[str]):
+
+def _queue_links(job_queue: JobQueue, links: Iterable[str]):
+    try:
+        queued_count = job_queue.put_all(links)
+        logger.info(f'Queued {queued_count} videos to {job_queue.path}')
+    finally:
+        job_queue.unregister_producer()
+
+
+def _lease_queued_links(job_queue: JobQueue, archive: Optional[DownloadArchive], retry_failed: bool) -> Iterator[str]:
+    '''Leases the queued links, acking the ones downloaded or failed permanently by the other processes at once'''
+    for link in job_queue.iter_leased():
+        if archive and (archive.contains(link) or (not retry_failed and archive.get_failure_reason(link) is not None)):
+            job_queue.ack(link)
+            continue
+        yield link
+
+
+def _download_videos(link_feed: LinkFeed, settings: _DownloadSettings):
     with Progress() as progress:
-        video_download_task = progress.add_task('Downloading Videos', total=len(video_links))
-        for index, video_link in enumerate(video_links):
-            progress.update(video_download_task, advance=1)
-            try:
-                _download_video(video_link, output, cookies_from_browser, (index, len(video_links)))
-            except Exception as e:
-                logger.error(f'Failed to download video from {video_link}: {e}')
+        video_download_task = progress.add_task('Downloading Videos', total=None)
+        for index, video_link in enumerate(link_feed):
+            progress.update(
+                video_download_task,
+                advance=1,
+                total=link_feed.discovered_count,
+                description=f'Downloading Videos ({settings.connection_budget.describe()})',
+            )
+            _download_video_safely(video_link, settings, (index, link_feed.discovered_count))
 
 
-def _download_videos_parallel(video_links: tuple[str], output: str, cookies_from_browser: Optional[str]):
-    args = [(video_link, output, cookies_from_browser) for video_link in video_links]
+def _download_videos_parallel(link_feed: LinkFeed, settings: _DownloadSettings, workers: int):
+    args = ((video_link, settings) for video_link in link_feed)
 
     with Progress() as progress:
-        video_download_task = progress.add_task('Downloading Videos', total=len(args))
-        for _ in execute_parallel(_download_video, args):
-            progress.update(video_download_task, advance=1)
+        video_download_task = progress.add_task('Downloading Videos', total=None)
+        for _ in execute_parallel(_download_video_safely, args, workers=workers):
+            progress.update(
+                video_download_task,
+                advance=1,
+                total=link_feed.discovered_count,
+                description=f'Downloading Videos ({settings.connection_budget.describe()})',
+            )
             progress.refresh()
 
 
+def _download_video_safely(
+    video_link: str,
+    settings: _DownloadSettings,
+    counters: Optional[tuple[int, int]] = None,
+):
+    '''Downloads the video, logging the error once the retries are exhausted instead of raising it
+    The links failed permanently are recorded in the archive, to be skipped by the next runs
+    '''
+    if settings.journal:
+        settings.journal.record_started(video_link)
+    try:
+        result = _download_video(video_link, settings, counters)
+        if settings.journal:
+            settings.journal.record_completed(video_link)
+        if settings.job_queue:
+            settings.job_queue.ack(video_link)
+        return result
+    except Exception as error:
+        error_class = classify_error(error)
+        logger.error(f'Failed to download video from {video_link} ({error_class.value} error): {error}')
+        if settings.journal:
+            settings.journal.record_failed(video_link, str(error))
+        if settings.job_queue:
+            settings.job_queue.fail(video_link, str(error))
+        if error_class is ErrorClass.PERMANENT and settings.archive:
+            settings.archive.add_failure(video_link, str(error))
+
+
 @retry(
     reraise=True,
     before_sleep=before_sleep_log(logger, logging.DEBUG),
     after=after_log(logger, logging.INFO),
-    stop=stop_after_attempt(60),
-    wait=wait_fixed(10),
+    retry=DOWNLOAD_RETRY_POLICY.should_retry,
+    stop=DOWNLOAD_RETRY_POLICY.should_stop,
+    wait=DOWNLOAD_RETRY_POLICY.get_wait,
 )
 def _download_video(
     video_link: str,
-    output: str,
-    cookies_from_browser: Optional[str],
+    settings: _DownloadSettings,
     counters: Optional[tuple[int, int]] = None,
 ):
+    settings.rate_limit_coordinator.acquire()  # waits while any worker is rate limited
+
+    timeline_tweet = settings.timeline_tweets.get(video_link)
+    if timeline_tweet and settings.direct_downloader:
+        try:
+            _download_timeline_tweet(timeline_tweet, settings.direct_downloader, settings)
+            _log_downloaded(timeline_tweet.title, counters)
+            return
+        except DirectDownloadError as error:
+            if classify_error(error) is ErrorClass.RATE_LIMITED:
+                settings.rate_limit_coordinator.report_rate_limited()
+                raise  # retried once the coordinator lets the downloads start again
+            logger.debug(f'Downloading {video_link} with yt-dlp instead: {error}')
+
+    try:
+        # the fragments of the file share the connections of the whole process with the other downloads
+        with settings.connection_budget.reserve_file() as fragment_count:
+            ydl = settings.youtube_dl_pool.acquire()
+            ydl.params['concurrent_fragment_downloads'] = fragment_count  # read by the downloaders of each file
+            result: dict[str, Any] = ydl.extract_info(video_link, download=True)  # type: ignore
+            if settings.archive:
+                _record_download(settings.archive, video_link, result)
+            _log_downloaded(result['title'], counters)
+            return result
+    except yt_dlp.utils.DownloadError as e:
+        if classify_error(e) is ErrorClass.RATE_LIMITED:
+            settings.rate_limit_coordinator.report_rate_limited()  # pauses the other workers as well
+        raise e  # retried by the class of the error
+
+
+def _get_ydl_opts(settings: _DownloadSettings) -> dict[str, Any]:
     nothing_logger = logging.getLogger('nothing')
     nothing_logger.setLevel(logging.CRITICAL)
+    connection_budget = settings.connection_budget
+    downloaded_bytes: dict[str, int] = {}  # of each file being downloaded, as yt-dlp reports the cumulative size
+    lock = threading.Lock()
+
+    def consume_bandwidth(status: dict[str, Any]):
+        # throttles the download against the bandwidth shared with the other downloads while it runs
+        with lock:
+            filename = str(status.get('filename'))
+            current_bytes = int(status.get('downloaded_bytes') or 0)
+            transferred_bytes = max(current_bytes - downloaded_bytes.get(filename, 0), 0)
+            downloaded_bytes[filename] = max(current_bytes, downloaded_bytes.get(filename, 0))
+            if status.get('status') in ('finished', 'error'):
+                del downloaded_bytes[filename]  # the same instance downloads the next files
+        if transferred_bytes:
+            connection_budget.consume(transferred_bytes)
+
     ydl_opts: dict[str, Any] = {
         'nocheckcertificate': True,
-        'concurrent_fragment_downloads': get_cpu_count() + 1,
-        'outtmpl': f'{output}/%(title).200B.%(upload_date>%Y-%m-%d)s.%(id)s.%(ext)s',
+        'continuedl': True,  # resumes the partial files of an interrupted run
+        'outtmpl': f'{settings.output}/%(title).200B.%(upload_date>%Y-%m-%d)s.%(id)s.%(ext)s',
         'no_warnings': True,
         'logger': nothing_logger,
+        'progress_hooks': [consume_bandwidth],
     }
-    if cookies_from_browser:
-        ydl_opts['cookiesfrombrowser'] = (cookies_from_browser, )  # noqa
+    if settings.cookies_from_browser:
+        ydl_opts['cookiesfrombrowser'] = (settings.cookies_from_browser, )  # noqa
+    return ydl_opts
 
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            result: dict[str, str] = ydl.extract_info(video_link, download=True)  # type: ignore
-            if counters:
-                logger.info(
-                    f"[{counters[0]+1}/{counters[1]}] Downloaded video [magenta]{result['title']}[/]",
-                    extra={'markup': True},
-                )
-            else:
-                logger.info(f"Downloaded video [magenta]{result['title']}[/]", extra={'markup': True})
-            return result
-    except yt_dlp.utils.DownloadError as e:
-        if '429' in str(e):  # Check if the error message contains "Too Many Requests"
-            logger.info('Too many requests. Waiting for 5 minutes and retrying...')
-            time.sleep(60 * 5)
-            raise e  # Raise the exception to retry
+
+def _download_timeline_tweet(tweet: TimelineTweet, direct_downloader: DirectDownloader, settings: _DownloadSettings):
+    '''Downloads the videos of the tweet captured from the timeline, skipping the extraction of yt-dlp'''
+    file_paths: list[str] = []
+    for index, media in enumerate(tweet.media):
+        video_id = tweet.status_id if len(tweet.media) == 1 else f'{tweet.status_id}_{index + 1}'
+        output_path = os.path.join(settings.output, f'{tweet.title}.{tweet.upload_date}.{video_id}.mp4')
+        _download_timeline_media(media, output_path, direct_downloader)
+        file_paths.append(output_path)
+
+    if settings.archive:
+        settings.archive.add(
+            tweet.link,
+            media_ids=tuple(media.media_id for media in tweet.media),
+            file_paths=tuple(file_paths),
+        )
+
+
+def _download_timeline_media(media: TimelineMedia, output_path: str, direct_downloader: DirectDownloader):
+    mp4_variants = sorted((variant for variant in media.variants if variant.content_type == 'video/mp4'),
+                          key=lambda variant: variant.bitrate)
+    for variant in media.variants:
+        if not variant.is_hls:
+            continue
+        try:
+            direct_downloader.download_hls(variant.url, output_path)
+            return
+        except DirectDownloadError:
+            if not mp4_variants:
+                raise
+    if not mp4_variants:
+        raise DirectDownloadError(f'No video variant to download for the media {media.media_id}')
+    direct_downloader.download_file(mp4_variants[-1].url, output_path)
+
+
+def _log_downloaded(title: str, counters: Optional[tuple[int, int]]):
+    if counters:
+        logger.info(f'[{counters[0]+1}/{counters[1]}] Downloaded video [magenta]{title}[/]', extra={'markup': True})
+    else:
+        logger.info(f'Downloaded video [magenta]{title}[/]', extra={'markup': True})
+
+
+def _record_download(archive: DownloadArchive, video_link: str, result: dict[str, Any]):
+    entries: list[dict[str, Any]] = result.get('entries') or [result]
+    media_ids = tuple(str(entry.get('id', '')) for entry in entries)
+    file_paths = tuple((entry.get('requested_downloads') or [{}])[0].get('filepath')  # path of the merged output file
+                       for entry in entries)
+    archive.add(video_link, media_ids=media_ids, file_paths=file_paths)
@@ -1,14 +1,114 @@
-from multiprocessing.dummy import Pool
-from typing import Any, Callable, Iterable
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, TypeVar
 
-from .istarmap import istarmap as _  # noqa
+T = TypeVar('T')
+
+
+class ExecutorMode(Enum):
+    THREAD = 'thread'  # I/O-bound functions, like the downloads
+    PROCESS = 'process'  # CPU-bound functions; the function and its arguments have to be picklable
+    ASYNC = 'async'  # coroutine functions, run on a private event loop
+
+
+def get_parallel_worker_count() -> int:
+    '''Default number of the functions `execute_parallel` runs at the same time'''
+    return os.cpu_count() or 1
 
 
 def execute_parallel(
     func: Callable[..., Any],
     args: Iterable[tuple[Any, ...]],
-):
-    pool = Pool()
-    results = pool.istarmap(func, args)
-    for result in results:
-        yield result
+    workers: Optional[int] = None,
+    mode: ExecutorMode = ExecutorMode.THREAD,
+    max_pending: Optional[int] = None,
+    ordered: bool = False,
+) -> Iterator[Any]:
+    '''Calls `func` with each of `args` on `workers` workers, yielding the results as they complete
+    (in the order of `args` if `ordered`)
+
+    At most `max_pending`(twice the workers by default) calls are submitted ahead of the results,
+    so a lazy `args` is consumed only as fast as the workers keep up.
+    Closing the iterator or a KeyboardInterrupt cancels the calls not started yet, and shuts the workers down.
+    '''
+    workers = max(workers or get_parallel_worker_count(), 1)
+    max_pending = max(max_pending or workers * 2, workers)
+    if mode is ExecutorMode.ASYNC:
+        yield from iter_async(_execute_async(func, args, workers, ordered))
+        return
+
+    executor: Executor = ThreadPoolExecutor(workers) if mode is ExecutorMode.THREAD else ProcessPoolExecutor(workers)
+    pending_futures: deque[Future[Any]] = deque()
+    try:
+        for arg in args:
+            if len(pending_futures) >= max_pending:
+                yield from _pop_completed(pending_futures, ordered)
+            pending_futures.append(executor.submit(func, *arg))
+        while pending_futures:
+            yield from _pop_completed(pending_futures, ordered)
+    except BaseException:  # KeyboardInterrupt, or GeneratorExit when the caller stops iterating
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+
+
+def _pop_completed(pending_futures: 'deque[Future[Any]]', ordered: bool) -> Iterator[Any]:
+    if ordered:
+        yield pending_futures.popleft().result()
+        return
+    done_futures, _ = wait(pending_futures, return_when=FIRST_COMPLETED)
+    for future in done_futures:
+        pending_futures.remove(future)
+        yield future.result()
+
+
+async def _execute_async(
+    func: Callable[..., Awaitable[Any]],
+    args: Iterable[tuple[Any, ...]],
+    workers: int,
+    ordered: bool,
+) -> AsyncIterator[Any]:
+    pending_tasks: deque[asyncio.Future[Any]] = deque()
+
+    async def pop_completed() -> list[Any]:
+        if ordered:
+            return [await pending_tasks.popleft()]
+        done_tasks, _ = await asyncio.wait(pending_tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done_tasks:
+            pending_tasks.remove(task)
+        return [task.result() for task in done_tasks]
+
+    try:
+        for arg in args:
+            if len(pending_tasks) >= workers:
+                for result in await pop_completed():
+                    yield result
+            pending_tasks.append(asyncio.ensure_future(func(*arg)))
+        while pending_tasks:
+            for result in await pop_completed():
+                yield result
+    finally:
+        for task in pending_tasks:
+            task.cancel()
+        await asyncio.gather(*pending_tasks, return_exceptions=True)
+
+
+def iter_async(async_iterator: AsyncIterator[T]) -> Iterator[T]:
+    '''Iterates the async iterator on a private event loop
+
+    The loop only runs while the next item is requested, so a slow consumer pauses the async iterator as well.
+    '''
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(async_iterator.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(async_iterator.aclose())  # type: ignore
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
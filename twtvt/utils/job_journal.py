@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from types import TracebackType
+from typing import Any, Optional
+
+
+class JournalEvent(Enum):
+    RUN = 'run'  # the targets of the run, written first
+    DISCOVERED = 'discovered'
+    CRAWLED = 'crawled'  # every target was crawled, no more links are discovered
+    STARTED = 'started'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+
+@dataclass
+class JournalState:
+    '''What a run recorded in its journal, replayed to resume it'''
+    target_uris: list[str] = field(default_factory=list)
+    discovered_links: dict[str, None] = field(default_factory=dict)  # in the order discovered
+    completed_links: set[str] = field(default_factory=set)
+    is_crawled: bool = False
+
+    @property
+    def pending_links(self) -> list[str]:
+        '''The links discovered but not downloaded yet, including the ones failed or interrupted'''
+        return [link for link in self.discovered_links if link not in self.completed_links]
+
+
+class JobJournal:
+    '''Append-only JSON lines journal of a run, recording the links as they are discovered and downloaded
+
+    Each event is flushed as soon as it happens, so a crashed run can be resumed from its journal.
+    A line cut off by the crash is ignored when replaying.
+    '''
+    FILE_NAME_FORMAT = 'twtvt-journal-{started_at}.jsonl'
+
+    path: str
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        if self._file.tell() and not self._ends_with_newline(path):
+            self._file.write('\n')  # ends the line cut off by a crash, so the next event starts a line of its own
+
+    @classmethod
+    def in_directory(cls, directory: str, target_uris: list[str]) -> 'JobJournal':
+        journal = cls(os.path.join(directory, cls.FILE_NAME_FORMAT.format(started_at=int(time.time()))))
+        journal._append(JournalEvent.RUN, target_uris=target_uris)
+        return journal
+
+    @staticmethod
+    def replay(path: str) -> JournalState:
+        state = JournalState()
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record: dict[str, Any] = json.loads(line)
+                    event = JournalEvent(record['event'])
+                except (ValueError, KeyError):  # cut off by a crash
+                    continue
+                if event is JournalEvent.RUN:
+                    state.target_uris = record['target_uris']
+                elif event is JournalEvent.DISCOVERED:
+                    state.discovered_links[record['link']] = None
+                elif event is JournalEvent.CRAWLED:
+                    state.is_crawled = True
+                elif event is JournalEvent.COMPLETED:
+                    state.completed_links.add(record['link'])
+        return state
+
+    def record_discovered(self, link: str) -> None:
+        self._append(JournalEvent.DISCOVERED, link=link)
+
+    def record_crawled(self) -> None:
+        self._append(JournalEvent.CRAWLED)
+
+    def record_started(self, link: str) -> None:
+        self._append(JournalEvent.STARTED, link=link)
+
+    def record_completed(self, link: str) -> None:
+        self._append(JournalEvent.COMPLETED, link=link)
+
+    def record_failed(self, link: str, reason: str) -> None:
+        self._append(JournalEvent.FAILED, link=link, reason=reason)
+
+    def _append(self, event: JournalEvent, **fields: Any) -> None:
+        line = json.dumps({'event': event.value, 'at': time.time(), **fields}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(f'{line}\n')
+            self._file.flush()
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self) -> 'JobJournal':
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -0,0 +1,181 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from types import TracebackType
+from typing import Iterable, Iterator, Optional
+
+
+class WorkerRole(Enum):
+    ALL = 'all'  # scrapes the targets into the queue, and downloads the queued links
+    SCRAPE = 'scrape'
+    DOWNLOAD = 'download'
+
+
+class JobState(Enum):
+    PENDING = 'pending'
+    LEASED = 'leased'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class JobQueue:
+    '''SQLite queue of the links to download, shared by the processes of one host or several hosts sharing a filesystem
+
+    A worker leases a link for `visibility_timeout` seconds, and acks it once downloaded;
+    the links leased by a crashed worker become pending again once their lease expires.
+    The scrapers register themselves while they queue links, so the workers know when no more links are coming.
+    SQLite locks the database file, which has to work on the shared filesystem as well(like NFS with `lockd`).
+    '''
+    DEFAULT_VISIBILITY_TIMEOUT = 30 * 60  # seconds, longer than a download takes
+    POLL_INTERVAL = 2  # seconds, between the leases while the queue is empty
+
+    path: str
+    owner: str
+    visibility_timeout: float
+
+    def __init__(self, path: str, owner: Optional[str] = None, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT):
+        self.path = path
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}'
+        self.visibility_timeout = visibility_timeout
+        self._lock = threading.Lock()
+        # no WAL, which needs a shared memory the hosts of a network filesystem do not share
+        self._connection = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        with self._lock, self._transaction():
+            self._connection.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    link TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires_at REAL,
+                    reason TEXT,
+                    enqueued_at REAL NOT NULL
+                )
+            ''')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, enqueued_at)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS producers (owner TEXT PRIMARY KEY)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+    def register_producer(self) -> None:
+        '''Tells the workers more links are coming, until `unregister_producer`'''
+        with self._lock, self._transaction():
+            self._connection.execute('INSERT OR IGNORE INTO producers VALUES (?)', (self.owner, ))
+            self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('has_producers', '1')")
+
+    def unregister_producer(self) -> None:
+        with self._lock, self._transaction():
+            self._connection.execute('DELETE FROM producers WHERE owner = ?', (self.owner, ))
+
+    def put_all(self, links: Iterable[str], batch_size: int = 500, max_delay: float = 1) -> int:
+        '''Queues the links in batches of `batch_size`, or every `max_delay` seconds while the links come slowly
+        Returns the count of the newly queued links; the links queued before are skipped
+        '''
+        queued_count = 0
+        batch: list[str] = []
+        flushed_at = time.monotonic()
+        for link in links:
+            batch.append(link)
+            if len(batch) >= batch_size or time.monotonic() - flushed_at >= max_delay:
+                queued_count += self._put(batch)
+                batch.clear()
+                flushed_at = time.monotonic()
+        return queued_count + self._put(batch)
+
+    def _put(self, links: list[str]) -> int:
+        if not links:
+            return 0
+        enqueued_at = time.time()
+        with self._lock, self._transaction():
+            cursor = self._connection.executemany(
+                'INSERT OR IGNORE INTO jobs (link, state, enqueued_at) VALUES (?, ?, ?)',
+                ((link, JobState.PENDING.value, enqueued_at) for link in links),
+            )
+            return cursor.rowcount
+
+    def lease(self) -> Optional[str]:
+        '''Leases the oldest pending link, or a link whose lease expired'''
+        now = time.time()
+        with self._lock, self._transaction():
+            row = self._connection.execute(
+                'SELECT link FROM jobs WHERE state = ? OR (state = ? AND lease_expires_at < ?) '
+                'ORDER BY enqueued_at LIMIT 1',
+                (JobState.PENDING.value, JobState.LEASED.value, now),
+            ).fetchone()
+            if not row:
+                return None
+            self._connection.execute(
+                'UPDATE jobs SET state = ?, lease_owner = ?, lease_expires_at = ? WHERE link = ?',
+                (JobState.LEASED.value, self.owner, now + self.visibility_timeout, row[0]),
+            )
+        return row[0]
+
+    def iter_leased(self) -> Iterator[str]:
+        '''Leases the links one by one, until the queue is drained and no scraper is queueing links anymore'''
+        while True:
+            link = self.lease()
+            if link:
+                yield link
+            elif self._is_drained():
+                return
+            else:
+                time.sleep(self.POLL_INTERVAL)
+
+    def ack(self, link: str) -> None:
+        self._finish(link, JobState.DONE)
+
+    def fail(self, link: str, reason: str) -> None:
+        self._finish(link, JobState.FAILED, reason)
+
+    def _finish(self, link: str, state: JobState, reason: Optional[str] = None) -> None:
+        with self._lock, self._transaction():
+            self._connection.execute(
+                'UPDATE jobs SET state = ?, reason = ?, lease_expires_at = NULL WHERE link = ? AND lease_owner = ?',
+                (state.value, reason, link, self.owner),
+            )
+
+    def get_counts(self) -> dict[JobState, int]:
+        with self._lock:
+            rows = self._connection.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall()
+        counts = {state: 0 for state in JobState}
+        counts.update({JobState(state): count for state, count in rows})
+        return counts
+
+    def _is_drained(self) -> bool:
+        with self._lock:
+            has_producers = self._connection.execute("SELECT 1 FROM meta WHERE key = 'has_producers'").fetchone()
+            producer = self._connection.execute('SELECT 1 FROM producers LIMIT 1').fetchone()
+            job = self._connection.execute(
+                'SELECT 1 FROM jobs WHERE state IN (?, ?) LIMIT 1',
+                (JobState.PENDING.value, JobState.LEASED.value),
+            ).fetchone()
+        # waits for the first scraper, if the workers started before it
+        return bool(has_producers) and not producer and not job
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        '''Takes the write lock of the database at the start, so two workers never lease the same link'''
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> 'JobQueue':
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -0,0 +1,46 @@
+from queue import Queue
+from threading import Thread
+from typing import Iterable, Iterator, Optional
+
+
+class LinkFeed:
+    '''Bounded queue of video links, filled by a scraper thread while the downloaders drain it.
+
+    Downloading starts as soon as the first link is found, so a run takes about max(scrape, download)
+    instead of their sum. The bound keeps the scraper from running too far ahead of the downloaders.
+    '''
+    DEFAULT_MAX_SIZE = 256
+
+    discovered_count: int
+
+    def __init__(self, links: Iterable[str], max_size: int = DEFAULT_MAX_SIZE):
+        self.discovered_count = 0
+        self._links = links
+        self._queue: Queue[Optional[str]] = Queue(maxsize=max_size)
+        self._error: Optional[BaseException] = None
+        self._thread = Thread(target=self._produce, name='twtvt-link-feed', daemon=True)
+
+    def start(self) -> 'LinkFeed':
+        self._thread.start()
+        return self
+
+    def _produce(self) -> None:
+        try:
+            for link in self._links:
+                self.discovered_count += 1
+                self._queue.put(link)
+        except BaseException as error:  # re-raised on the consumer side
+            self._error = error
+        finally:
+            self._queue.put(None)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            link = self._queue.get()
+            if link is None:
+                break
+            yield link
+
+        self._thread.join()
+        if self._error:
+            raise self._error
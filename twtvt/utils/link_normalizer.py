@@ -0,0 +1,24 @@
+import re
+from typing import Optional
+
+TWITTER_STATUS_PATTERN = re.compile(
+    r'^(?:https?://)?(?:www\.|mobile\.)?(?:twitter|x)\.com/(\w+)/status(?:es)?/(\d+)(?:[/?#].*)?$',
+    re.IGNORECASE,
+)
+MONSNODE_PATTERN = re.compile(r'^(?:https?://)?(?:www\.)?monsnode\.com/(v\d+)(?:[/?#].*)?$', re.IGNORECASE)
+
+
+def normalize_link(line: str) -> Optional[str]:
+    '''Returns the canonical link of a video tweet or a monsnode video in the line, or None if there is none
+
+    twitter.com, x.com and mobile links become `https://twitter.com/<user>/status/<id>`,
+    dropping the query string and the trailing `/video/1` or `/photo/1`.
+    '''
+    line = line.strip()
+    matched = TWITTER_STATUS_PATTERN.match(line)
+    if matched:
+        return f'https://twitter.com/{matched.group(1)}/status/{matched.group(2)}'
+    matched = MONSNODE_PATTERN.match(line)
+    if matched:
+        return f'https://monsnode.com/{matched.group(1)}'
+    return None
@@ -0,0 +1,30 @@
+from typing import Iterable, Iterator
+
+
+class OrderedLinkSet:
+    '''Insertion-ordered set of links
+
+    Keeps the timeline order of the links while finding a link in O(1),
+    and reports only the links that were not seen before on each update.
+    '''
+
+    def __init__(self, links: Iterable[str] = ()):
+        self._links: dict[str, None] = dict.fromkeys(links)
+
+    def add_new(self, links: Iterable[str]) -> list[str]:
+        '''Adds the links, returning the newly seen ones in the given order'''
+        new_links: list[str] = []
+        for link in links:
+            if link not in self._links:
+                self._links[link] = None
+                new_links.append(link)
+        return new_links
+
+    def __contains__(self, link: object) -> bool:
+        return link in self._links
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._links)
+
+    def __len__(self) -> int:
+        return len(self._links)
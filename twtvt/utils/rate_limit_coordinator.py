@@ -0,0 +1,89 @@
+import math
+import threading
+import time
+from typing import Callable
+
+from twtvt.utils.logger import logger
+
+
+class RateLimitCoordinator:
+    '''Process-wide pacing of the downloads, shared by every worker
+
+    A token bucket lets at most `max_rate` downloads start per second. A 429 reported by any worker opens
+    the circuit, which pauses every worker for `cooldown` seconds(doubling on repeated 429s up to `max_cooldown`),
+    then the rate ramps back up from `min_rate` to `max_rate` over `ramp_up` seconds.
+    '''
+    max_rate: float
+    min_rate: float
+    cooldown: float
+    max_cooldown: float
+    ramp_up: float
+
+    def __init__(
+        self,
+        max_rate: float = 4,
+        min_rate: float = 0.2,
+        cooldown: float = 60 * 5,
+        max_cooldown: float = 60 * 30,
+        ramp_up: float = 60 * 5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.ramp_up = ramp_up
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = max(max_rate, 1.0)
+        self._updated_at = clock()
+        self._paused_until = -math.inf
+        self._strike_count = 0
+
+    def acquire(self) -> None:
+        '''Blocks until the next download may start'''
+        while True:
+            with self._lock:
+                now = self._clock()
+                wait_seconds = self._paused_until - now
+                if wait_seconds <= 0:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait_seconds = (1 - self._tokens) / self._get_rate(now)
+            self._sleep(wait_seconds)
+
+    def report_rate_limited(self) -> None:
+        '''Pauses every worker; the workers which hit the same 429 while paused don't extend the pause'''
+        with self._lock:
+            now = self._clock()
+            if now < self._paused_until:
+                return
+            if now > self._paused_until + self.ramp_up:
+                self._strike_count = 0  # fully recovered since the last 429
+            self._strike_count += 1
+            pause_seconds = min(self.cooldown * 2**(self._strike_count - 1), self.max_cooldown)
+            self._paused_until = now + pause_seconds
+            self._tokens = 0
+            self._updated_at = self._paused_until
+        logger.warning(f'Too many requests. Pausing every download for {pause_seconds:.0f} seconds...')
+
+    def get_current_rate(self) -> float:
+        '''Downloads allowed to start per second now, 0 while paused'''
+        with self._lock:
+            now = self._clock()
+            return 0 if now < self._paused_until else self._get_rate(now)
+
+    def _get_rate(self, now: float) -> float:
+        if self.ramp_up <= 0:
+            return self.max_rate
+        progress = min(max((now - self._paused_until) / self.ramp_up, 0), 1)
+        return self.min_rate + (self.max_rate - self.min_rate) * progress
+
+    def _refill(self, now: float) -> None:
+        elapsed_seconds = max(now - self._updated_at, 0)
+        self._tokens = min(self._tokens + elapsed_seconds * self._get_rate(now), max(self.max_rate, 1.0))
+        self._updated_at = now
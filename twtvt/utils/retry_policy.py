@@ -0,0 +1,100 @@
+import random
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional
+
+import httpx
+from tenacity import RetryCallState
+
+from twtvt.utils.direct_downloader import DirectDownloadError
+
+RATE_LIMITED_PATTERN = re.compile(r'\b429\b|too many requests|rate.?limit', re.IGNORECASE)
+SERVER_ERROR_PATTERN = re.compile(r'HTTP Error 5\d\d\b', re.IGNORECASE)  # `503: Service Unavailable` is transient
+PERMANENT_PATTERN = re.compile(
+    r'\b(404|410)\b|not found|no video|unsupported url|private|protected|suspended|deleted|unavailable'
+    r'|does not exist|requires authentication',
+    re.IGNORECASE,
+)
+PERMANENT_STATUS_CODES = (404, 410)
+
+
+class ErrorClass(Enum):
+    PERMANENT = 'permanent'  # deleted or protected tweets, tweets without a video; retrying never helps
+    RATE_LIMITED = 'rate_limited'
+    TRANSIENT = 'transient'  # network errors and server errors
+
+
+def classify_error(error: BaseException) -> ErrorClass:
+    '''Classifies the errors of yt-dlp, httpx and `DirectDownloader` by whether retrying them may help'''
+    status_code: Optional[int] = None
+    if isinstance(error, DirectDownloadError):
+        status_code = error.status_code
+    elif isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+    if status_code == 429:
+        return ErrorClass.RATE_LIMITED
+    if status_code in PERMANENT_STATUS_CODES:
+        return ErrorClass.PERMANENT
+    if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return ErrorClass.TRANSIENT
+
+    message = str(error)
+    if RATE_LIMITED_PATTERN.search(message):
+        return ErrorClass.RATE_LIMITED
+    if SERVER_ERROR_PATTERN.search(message):
+        return ErrorClass.TRANSIENT
+    if PERMANENT_PATTERN.search(message):
+        return ErrorClass.PERMANENT
+    return ErrorClass.TRANSIENT
+
+
+@dataclass(frozen=True)
+class Backoff:
+    '''Exponential backoff with full jitter, giving up after `max_attempts` attempts'''
+    max_attempts: int
+    base: float = 1
+    max_wait: float = 60
+
+    def get_wait(self, attempt_number: int) -> float:
+        return random.uniform(0, min(self.max_wait, self.base * 2**(attempt_number - 1)))
+
+
+def _get_default_backoffs() -> dict[ErrorClass, Backoff]:
+    return {
+        ErrorClass.PERMANENT: Backoff(max_attempts=1),
+        # `RateLimitCoordinator` holds the workers back while rate limited, the backoff only spreads them out
+        ErrorClass.RATE_LIMITED: Backoff(max_attempts=20, base=5, max_wait=60),
+        ErrorClass.TRANSIENT: Backoff(max_attempts=6, base=2, max_wait=60),
+    }
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    '''tenacity `retry`, `stop` and `wait` callbacks backing off by the class of the last error
+
+        @retry(retry=policy.should_retry, stop=policy.should_stop, wait=policy.get_wait)
+    '''
+    backoffs: dict[ErrorClass, Backoff] = field(default_factory=_get_default_backoffs)
+
+    def should_retry(self, retry_state: RetryCallState) -> bool:
+        error = self._get_error(retry_state)
+        return error is not None and classify_error(error) is not ErrorClass.PERMANENT
+
+    def should_stop(self, retry_state: RetryCallState) -> bool:
+        error = self._get_error(retry_state)
+        if error is None:
+            return True
+        return retry_state.attempt_number >= self.backoffs[classify_error(error)].max_attempts
+
+    def get_wait(self, retry_state: RetryCallState) -> float:
+        error = self._get_error(retry_state)
+        if error is None:
+            return 0
+        return self.backoffs[classify_error(error)].get_wait(retry_state.attempt_number)
+
+    @staticmethod
+    def _get_error(retry_state: RetryCallState) -> Optional[BaseException]:
+        if retry_state.outcome is None or not retry_state.outcome.failed:
+            return None
+        return retry_state.outcome.exception()
@@ -0,0 +1,84 @@
+import asyncio
+from typing import AsyncIterator, Optional
+
+from playwright.async_api import BrowserContext
+
+from twtvt.utils.async_twitter_parser import AsyncTwitterParser
+from twtvt.utils.logger import logger
+from twtvt.utils.scroll_policy import ScrollPolicy
+from twtvt.utils.timeline_response_parser import TimelineTweet
+from twtvt.utils.uri_validator import URIValidator
+
+
+async def crawl_video_links(
+    context: BrowserContext,
+    target_links: list[str],
+    concurrency: int = 1,
+    until_link: Optional[str] = None,
+    limit: Optional[int] = None,
+    capture_responses: bool = False,
+    scroll_policy: ScrollPolicy = ScrollPolicy(),
+    block_resources: bool = False,
+    timeline_tweets: Optional[dict[str, TimelineTweet]] = None,
+) -> AsyncIterator[str]:
+    '''Crawls the video tweets of the target links on up to `concurrency` pages of the logged-in context
+    Yields the links as soon as any of the pages finds them
+    `timeline_tweets` collects the tweets of the timeline responses, keyed by their link, when given
+    '''
+    for target_link in target_links:
+        if not URIValidator.is_media_link(target_link) and not URIValidator.is_liked_link(target_link):
+            yield target_link  # a video tweet itself
+
+    timeline_links = [
+        target_link for target_link in target_links
+        if URIValidator.is_media_link(target_link) or URIValidator.is_liked_link(target_link)
+    ]
+    if not timeline_links:
+        return
+
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    found_links: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=max(concurrency, 1) * 64)
+
+    async def crawl(target_link: str) -> None:
+        async with semaphore:
+            logger.info(f'Extracting video links from {target_link}')
+            page = await context.new_page()
+            try:
+                twitter_parser = AsyncTwitterParser(
+                    page,
+                    capture_timeline_responses=capture_responses,
+                    scroll_policy=scroll_policy,
+                    timeline_tweets=timeline_tweets,
+                    collect_timeline_tweets=timeline_tweets is not None,
+                )
+                if block_resources:
+                    await twitter_parser.enable_crawl_mode()
+                iter_video_tweets = (twitter_parser.iter_media_video_tweets_until
+                                     if URIValidator.is_media_link(target_link) else
+                                     twitter_parser.iter_liked_video_tweets_until)
+                target_username = target_link.split('/')[3]
+                async for link in iter_video_tweets(target_username, until_link or '', limit=limit):
+                    await found_links.put(link)
+            finally:
+                await page.close()
+
+    crawls = [asyncio.ensure_future(crawl(target_link)) for target_link in timeline_links]
+
+    async def close_when_crawled() -> None:
+        try:
+            await asyncio.gather(*crawls)
+        finally:
+            await found_links.put(None)
+
+    closing = asyncio.ensure_future(close_when_crawled())
+    try:
+        while True:
+            link = await found_links.get()
+            if link is None:
+                break
+            yield link
+        await closing  # raises the error of the crawls, if any
+    finally:
+        for task in (*crawls, closing):
+            task.cancel()
+        await asyncio.gather(*crawls, closing, return_exceptions=True)
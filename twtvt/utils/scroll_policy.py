@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ScrollPolicy:
+    '''How the timelines are scrolled
+
+    After each scroll, the parser waits until new tweets are rendered or a timeline request finishes,
+    but at most `max_wait` seconds. The bottom of the timeline is assumed after `max_stale_scrolls`
+    scrolls in a row without any new content.
+    '''
+    wheel_delta: int = 1500  # pixels scrolled at once
+    max_wait: float = 3.0  # seconds
+    poll_interval: float = 0.05  # seconds
+    max_stale_scrolls: int = 5
@@ -0,0 +1,65 @@
+import json
+import os
+import re
+import time
+from typing import Any, Optional
+
+from twtvt.utils.cookie_parser import TWITTER_COOKIE_DOMAINS, is_cookie_of_domains
+
+
+class SessionCache:
+    '''Playwright storage state of a logged-in twitter session, reused by the next runs until it expires
+
+    One file is kept per identity, which is the username or the browser the cookies came from.
+    '''
+    DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'twtvt', 'sessions')
+    DEFAULT_MAX_AGE = 60 * 60 * 24 * 7  # seconds
+
+    path: str
+    max_age: float
+
+    def __init__(self, path: str, max_age: float = DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+
+    @classmethod
+    def for_identity(cls, identity: str, directory: str = DEFAULT_DIRECTORY) -> 'SessionCache':
+        file_name = re.sub(r'[^\w.-]', '_', identity)
+        return cls(os.path.join(directory, f'{file_name}.json'))
+
+    def load(self) -> Optional[dict[str, Any]]:
+        '''Returns the cached storage state, or None if it is missing or expired'''
+        try:
+            if time.time() - os.path.getmtime(self.path) > self.max_age:
+                return None
+            with open(self.path, 'r') as f:
+                storage_state: dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return storage_state if self._has_valid_auth_token(storage_state) else None
+
+    def save(self, storage_state: dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            json.dump(storage_state, f)
+        os.replace(temporary_path, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _has_valid_auth_token(storage_state: dict[str, Any]) -> bool:
+        now = time.time()
+        for cookie in storage_state.get('cookies', []):
+            if cookie.get('name') != 'auth_token':
+                continue
+            if not is_cookie_of_domains(cookie.get('domain', ''), TWITTER_COOKIE_DOMAINS):
+                continue
+            expires = cookie.get('expires', -1)
+            if expires == -1 or expires > now:
+                return True
+        return False
@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import tempfile
+from types import TracebackType
+from typing import Iterable, Optional
+
+
+class SpillingLinkSet:
+    '''Set of links which moves its links to a temporary SQLite file once it holds `max_memory_links` in memory
+
+    Deduplicates input files with millions of links in a bounded memory;
+    the links are kept in memory until the threshold, so small runs never touch the disk.
+    '''
+    DEFAULT_MAX_MEMORY_LINKS = 1_000_000
+
+    max_memory_links: int
+
+    def __init__(self, links: Iterable[str] = (), max_memory_links: int = DEFAULT_MAX_MEMORY_LINKS):
+        self.max_memory_links = max_memory_links
+        self._memory_links: set[str] = set()
+        self._spilled_count = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._path: Optional[str] = None
+        for link in links:
+            self.add_new(link)
+
+    def add_new(self, link: str) -> bool:
+        '''Adds the link, returning whether it was not seen before'''
+        if link in self:
+            return False
+        self._memory_links.add(link)
+        if len(self._memory_links) >= self.max_memory_links:
+            self._spill()
+        return True
+
+    def _spill(self) -> None:
+        if not self._connection:
+            file_descriptor, self._path = tempfile.mkstemp(prefix='twtvt-links-', suffix='.sqlite3')
+            os.close(file_descriptor)
+            self._connection = sqlite3.connect(self._path, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=OFF')  # a scratch file, removed on close
+            self._connection.execute('PRAGMA synchronous=OFF')
+            self._connection.execute('CREATE TABLE links (link TEXT PRIMARY KEY) WITHOUT ROWID')
+        with self._connection:
+            self._connection.executemany('INSERT OR IGNORE INTO links VALUES (?)',
+                                         ((link, ) for link in self._memory_links))
+        self._spilled_count += len(self._memory_links)
+        self._memory_links.clear()
+
+    def __contains__(self, link: object) -> bool:
+        if link in self._memory_links:
+            return True
+        if not self._connection:
+            return False
+        return self._connection.execute('SELECT 1 FROM links WHERE link = ?', (link, )).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._spilled_count + len(self._memory_links)
+
+    def close(self) -> None:
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+        if self._path:
+            os.remove(self._path)
+            self._path = None
+
+    def __enter__(self) -> 'SpillingLinkSet':
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
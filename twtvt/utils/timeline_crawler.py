@@ -0,0 +1,167 @@
+from http.cookiejar import CookieJar
+from typing import Any, Optional, Protocol
+
+from twtvt.utils.logger import logger
+from twtvt.utils.ordered_link_set import OrderedLinkSet
+from twtvt.utils.scroll_policy import ScrollPolicy
+from twtvt.utils.timeline_response_parser import TimelineTweet, is_timeline_response, parse_timeline_video_tweets
+
+LOGIN_URL = 'https://twitter.com/i/flow/login'
+HOME_URL = 'https://twitter.com/home'
+USERNAME_INPUT_SELECTOR = 'label:has-text(\"Phone, email, or username\") div >> nth=1'
+USERNAME_LABEL = 'Phone, email, or username'
+PASSWORD_LABEL = 'Password'
+TIMELINE_SELECTOR = 'article'
+LOGGED_IN_SELECTOR = '[data-testid="SideNav_AccountSwitcher_Button"]'  # only rendered for a logged-in user
+
+ARTICLES_IN_CURRENT_SCREEN_SCRIPT = '''
+() => Array.from(document.querySelectorAll('article'), (article) => {
+    const link = article.querySelectorAll('div a')[3];
+    return {
+        href: link ? link.getAttribute('href') : null,
+        hasVideo: article.querySelector('video') !== null,
+    };
+})
+'''
+CONTENT_MARKER_SCRIPT = '''
+() => {
+    const articles = document.querySelectorAll('article');
+    const lastArticle = articles[articles.length - 1];
+    const link = lastArticle ? lastArticle.querySelectorAll('div a')[3] : null;
+    return `${articles.length}:${link ? link.getAttribute('href') : ''}`;
+}
+'''
+
+
+class _HasURL(Protocol):
+
+    @property
+    def url(self) -> str:
+        ...
+
+
+def to_playwright_cookies(cookiejar: CookieJar) -> list[dict[str, Any]]:
+    playwright_cookies: list[dict[str, Any]] = []
+
+    for cookie in cookiejar:
+        cookie_attrs = vars(cookie)
+        target_playwright_cookie: dict[str, Any] = {
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'httpOnly': cookie_attrs.get('_rest', {}).get('HttpOnly', False),
+            'secure': bool(cookie.secure)
+        }
+        if cookie.expires is not None:
+            target_playwright_cookie['expires'] = cookie.expires
+
+        playwright_cookies.append(target_playwright_cookie)
+
+    return playwright_cookies
+
+
+def parse_rendered_articles(articles: list[dict[str, Any]]) -> list[tuple[str, bool]]:
+    '''Returns the link of the rendered tweets and whether each tweet has a video
+    `articles` is the result of `ARTICLES_IN_CURRENT_SCREEN_SCRIPT`
+    '''
+    return [('https://twitter.com' + article['href'], bool(article['hasVideo'])) for article in articles
+            if article['href']]  # articles without the link are not rendered yet
+
+
+class TimelineCapture:
+    '''Page event handlers shared by the sync and async parsers
+
+    Counts the finished timeline requests, which tells that the timeline has grown after a scroll,
+    and keeps the timeline responses to be parsed outside of the event handlers.
+    '''
+    capture_responses: bool
+    timeline_tweets: dict[str, TimelineTweet]
+    finished_request_count: int
+
+    def __init__(self, capture_responses: bool, timeline_tweets: Optional[dict[str, TimelineTweet]] = None):
+        self.capture_responses = capture_responses
+        self.timeline_tweets = timeline_tweets if timeline_tweets is not None else {}
+        self.finished_request_count = 0
+        self._responses: list[Any] = []
+
+    def attach(self, page: Any) -> None:
+        '''Registers the handlers on a sync or async playwright page'''
+        page.on('requestfinished', self._request_finished_handler)
+        if self.capture_responses:
+            page.on('response', self._response_handler)
+
+    def take_responses(self) -> list[Any]:
+        responses, self._responses = self._responses, []
+        return responses
+
+    def add_timeline_payload(self, payload: dict[str, Any]) -> list[str]:
+        '''Parses a captured timeline response, returning the links of its video tweets'''
+        tweets = parse_timeline_video_tweets(payload)
+        for tweet in tweets:
+            self.timeline_tweets[tweet.link] = tweet
+        return [tweet.link for tweet in tweets]
+
+    def _request_finished_handler(self, request: _HasURL) -> None:
+        if is_timeline_response(request.url):
+            self.finished_request_count += 1
+
+    def _response_handler(self, response: _HasURL) -> None:
+        if is_timeline_response(response.url):
+            self._responses.append(response)
+
+
+class TimelineScrollState:
+    '''Stop, deduplication and limit rules of scrolling down a timeline, shared by the sync and async parsers'''
+    until_link: str
+    limit: Optional[int]
+    scroll_policy: ScrollPolicy
+    max_wait: float
+    links: OrderedLinkSet
+    is_finished: bool
+    has_new_content: bool  # whether the last scroll made anything new appear
+
+    def __init__(
+        self,
+        until_link: str,
+        limit: Optional[int],
+        scroll_policy: ScrollPolicy,
+        scroll_timeout: Optional[float] = None,
+    ):
+        if limit is not None and limit < 1:
+            raise ValueError('limit must be 1 or larger')
+        self.until_link = until_link
+        self.limit = limit
+        self.scroll_policy = scroll_policy
+        self.max_wait = scroll_timeout if scroll_timeout is not None else scroll_policy.max_wait
+        self.links = OrderedLinkSet()
+        self.is_finished = False
+        self.has_new_content = True
+        self._yielded_count = 0
+        self._stale_scroll_count = 0
+
+    def add_found_links(self, found_links: list[str]) -> list[str]:
+        '''Returns the links to yield among the found ones, finishing the scroll if it's time to stop
+        Stops when the `until_link`(inclusive) or `limit` links are found,
+        or nothing new appeared for a while(the bottom of the page)
+        '''
+        new_links = self.links.add_new(found_links)
+        if self.until_link in new_links:
+            new_links = new_links[:new_links.index(self.until_link) + 1]
+        if self.limit is not None:
+            new_links = new_links[:self.limit - self._yielded_count]
+        self._yielded_count += len(new_links)
+
+        logger.debug(f'Found {len(self.links)} video tweets.')
+
+        if self.until_link in self.links:
+            logger.debug("Found the given 'until_link' in the tweets.")
+            self.is_finished = True
+        elif self.limit is not None and self._yielded_count >= self.limit:
+            self.is_finished = True
+        else:
+            self._stale_scroll_count = 0 if self.has_new_content or new_links else self._stale_scroll_count + 1
+            if self._stale_scroll_count >= self.scroll_policy.max_stale_scrolls:
+                logger.debug('Reached to the bottom of the tweets.')
+                self.is_finished = True
+        return new_links
@@ -0,0 +1,113 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+TIMELINE_RESPONSE_PATTERN = re.compile(r'/graphql/[^/]+/(Likes|UserMedia)\?')
+TRAILING_SHORT_LINK_PATTERN = re.compile(r'\s*https://t\.co/\w+$')
+CREATED_AT_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+VIDEO_MEDIA_TYPES = ('video', 'animated_gif')
+
+
+@dataclass(frozen=True)
+class VideoVariant:
+    url: str
+    content_type: str
+    bitrate: int = 0
+
+    @property
+    def is_hls(self) -> bool:
+        return self.content_type == 'application/x-mpegURL'
+
+
+@dataclass(frozen=True)
+class TimelineMedia:
+    media_id: str
+    variants: tuple[VideoVariant, ...]
+
+
+@dataclass(frozen=True)
+class TimelineTweet:
+    status_id: str
+    screen_name: str
+    text: str
+    created_at: str
+    media: tuple[TimelineMedia, ...]
+
+    @property
+    def link(self) -> str:
+        return f'https://twitter.com/{self.screen_name}/status/{self.status_id}'
+
+    @property
+    def title(self) -> str:
+        '''Title of the tweet like the one yt-dlp gives, at most 200 bytes'''
+        text = TRAILING_SHORT_LINK_PATTERN.sub('', self.text)
+        title = f'{self.screen_name} - {text}'.replace('/', '_').replace('\n', ' ')
+        return title.encode()[:200].decode(errors='ignore')
+
+    @property
+    def upload_date(self) -> str:
+        try:
+            return datetime.strptime(self.created_at, CREATED_AT_FORMAT).strftime('%Y-%m-%d')
+        except ValueError:
+            return 'NA'
+
+
+def is_timeline_response(url: str) -> bool:
+    '''Whether the url is of the Likes or UserMedia timeline GraphQL API'''
+    return TIMELINE_RESPONSE_PATTERN.search(url) is not None
+
+
+def parse_timeline_video_tweets(payload: dict[str, Any]) -> list[TimelineTweet]:
+    '''Parses the video tweets of a timeline GraphQL response, in the timeline order'''
+    tweets: list[TimelineTweet] = []
+    for tweet_result in _iter_tweet_results(payload):
+        tweet = _parse_tweet_result(tweet_result)
+        if tweet and tweet.media:
+            tweets.append(tweet)
+    return tweets
+
+
+def _iter_tweet_results(node: Any) -> Iterator[dict[str, Any]]:
+    if isinstance(node, list):
+        for child in node:  # type: ignore
+            yield from _iter_tweet_results(child)
+    elif isinstance(node, dict):
+        tweet_results: Optional[dict[str, Any]] = node.get('tweet_results')  # type: ignore
+        if tweet_results is not None:
+            yield tweet_results.get('result', {})
+            return
+        for child in node.values():  # type: ignore
+            yield from _iter_tweet_results(child)
+
+
+def _parse_tweet_result(result: dict[str, Any]) -> Optional[TimelineTweet]:
+    if result.get('__typename') == 'TweetWithVisibilityResults':
+        result = result.get('tweet', {})
+    status_id: Optional[str] = result.get('rest_id')
+    legacy: dict[str, Any] = result.get('legacy', {})
+    if not status_id or not legacy:
+        return None
+
+    user: dict[str, Any] = result.get('core', {}).get('user_results', {}).get('result', {})
+    screen_name: str = user.get('legacy', {}).get('screen_name') or user.get('core', {}).get('screen_name') or 'i'
+
+    return TimelineTweet(
+        status_id=status_id,
+        screen_name=screen_name,
+        text=legacy.get('full_text', ''),
+        created_at=legacy.get('created_at', ''),
+        media=tuple(
+            _parse_media(media) for media in legacy.get('extended_entities', {}).get('media', [])
+            if media.get('type') in VIDEO_MEDIA_TYPES),
+    )
+
+
+def _parse_media(media: dict[str, Any]) -> TimelineMedia:
+    variants = tuple(
+        VideoVariant(
+            url=variant['url'],
+            content_type=variant.get('content_type', ''),
+            bitrate=variant.get('bitrate', 0),
+        ) for variant in media.get('video_info', {}).get('variants', []))
+    return TimelineMedia(media_id=media.get('id_str', ''), variants=variants)
@@ -1,64 +1,106 @@
 import time
 from http.cookiejar import CookieJar
-from typing import Optional
+from typing import Any, Iterator, Optional
 
-from playwright.sync_api import Error, Page, Request
+from playwright.sync_api import Error, Page, Request, Response, Route
 
+from twtvt.utils.crawl_filter import should_block_request
 from twtvt.utils.logger import logger
+from twtvt.utils.scroll_policy import ScrollPolicy
+from twtvt.utils.timeline_crawler import (
+    ARTICLES_IN_CURRENT_SCREEN_SCRIPT,
+    CONTENT_MARKER_SCRIPT,
+    HOME_URL,
+    LOGGED_IN_SELECTOR,
+    LOGIN_URL,
+    PASSWORD_LABEL,
+    TIMELINE_SELECTOR,
+    USERNAME_INPUT_SELECTOR,
+    USERNAME_LABEL,
+    TimelineCapture,
+    TimelineScrollState,
+    parse_rendered_articles,
+    to_playwright_cookies,
+)
+from twtvt.utils.timeline_response_parser import TimelineTweet
 
 
 class TwitterParser:
+    '''Sync playwright crawler of the timelines
+    The crawl rules are shared with `AsyncTwitterParser` in `timeline_crawler`; this class only does the I/O.
+    '''
     page: Page
-
-    def __init__(self, page: Page):
+    capture_timeline_responses: bool
+    scroll_policy: ScrollPolicy
+
+    def __init__(
+            self,
+            page: Page,
+            capture_timeline_responses: bool = False,
+            scroll_policy: ScrollPolicy = ScrollPolicy(),
+            block_resources: bool = False,
+    ):
+        '''`capture_timeline_responses` collects video tweets from the Likes/UserMedia GraphQL responses
+        instead of the rendered articles; each response holds a whole page of tweets.
+        `block_resources` enables the crawl mode, see `enable_crawl_mode`.
+        '''
         self.page = page
+        self.capture_timeline_responses = capture_timeline_responses
+        self.scroll_policy = scroll_policy
+        self._timeline_capture = TimelineCapture(capture_timeline_responses)
+        self._timeline_capture.attach(page)
+        if block_resources:
+            self.enable_crawl_mode()
 
     @property
-    def page_current_height(self) -> int:
-        current_height: int = self.page.evaluate('(window.innerHeight + window.scrollY)')
-        return current_height
+    def timeline_tweets(self) -> dict[str, TimelineTweet]:
+        '''The tweets captured from the timeline responses, keyed by their link'''
+        return self._timeline_capture.timeline_tweets
+
+    def enable_crawl_mode(self) -> None:
+        '''Aborts the requests of images, fonts and video segments, which are not needed to find the tweets'''
+        self.page.route('**/*', self._crawl_route_handler)
+
+    def disable_crawl_mode(self) -> None:
+        self.page.unroute('**/*', self._crawl_route_handler)
+
+    def _crawl_route_handler(self, route: Route) -> None:
+        if should_block_request(route.request.url, route.request.resource_type):
+            route.abort()
+        else:
+            route.continue_()
 
     def login(self, username: str, password: str, timeout: Optional[float] = 10000) -> None:
         logger.info('Logging in...')
-        self.page.goto('https://twitter.com/i/flow/login')
-        self.page.wait_for_selector('label:has-text(\"Phone, email, or username\") div >> nth=1')
-        self.page.get_by_label('Phone, email, or username').click()
-        self.page.get_by_label('Phone, email, or username').fill(username)
-        self.page.get_by_label('Phone, email, or username').press('Enter')
+        self.page.goto(LOGIN_URL)
+        self.page.wait_for_selector(USERNAME_INPUT_SELECTOR)
+        self.page.get_by_label(USERNAME_LABEL).click()
+        self.page.get_by_label(USERNAME_LABEL).fill(username)
+        self.page.get_by_label(USERNAME_LABEL).press('Enter')
         try:
-            password_input = self.page.get_by_label('Password', exact=True)
+            password_input = self.page.get_by_label(PASSWORD_LABEL, exact=True)
             password_input.fill(password, timeout=timeout)
             password_input.press('Enter')
         except Error as error:
             raise ValueError('Login failed; Maybe username or password is incorrect?') from error
-        self.page.wait_for_url('https://twitter.com/home')
+        self.page.wait_for_url(HOME_URL)
         logger.info('Logged in successfully.')
 
+    def is_logged_in(self, timeout: float = 10000) -> bool:
+        '''Opens the home timeline, returning whether it is rendered for a logged-in user within `timeout` ms'''
+        self.page.goto(HOME_URL)
+        try:
+            self.page.wait_for_selector(LOGGED_IN_SELECTOR, timeout=timeout)
+        except Error:
+            return False
+        return True
+
     def login_with_cookiejar(self, cookiejar: CookieJar) -> None:
         logger.info('Logging in by cookies...')
-        self.page.goto('https://twitter.com/home')
-
-        playwright_cookies = []
-
-        for cookie in cookiejar:
-            cookie_attrs = vars(cookie)
-            target_playwright_cookie = {
-                'name': cookie.name,
-                'value': cookie.value,
-                'domain': cookie.domain,
-                'path': cookie.path,
-                'httpOnly': cookie_attrs.get('_rest', {}).get('HttpOnly', False),
-                'secure': bool(cookie.secure)
-            }
-            if cookie.expires is not None:
-                target_playwright_cookie['expires'] = cookie.expires
+        self.page.context.add_cookies(to_playwright_cookies(cookiejar))  # type: ignore
+        self.page.goto(HOME_URL)
 
-            playwright_cookies.append(target_playwright_cookie)
-
-        self.page.context.add_cookies(playwright_cookies)
-        self.page.goto('https://twitter.com/home')
-
-    def get_all_liked_video_tweets(self, username: str, scroll_timeout: float = 0.8) -> list[str]:
+    def get_all_liked_video_tweets(self, username: str, scroll_timeout: Optional[float] = None) -> list[str]:
         """Get the username's all liked tweets
         Returns the list of links of liked tweets
         """
@@ -66,62 +108,47 @@ class TwitterParser:
             username, 'nothing', scroll_timeout
         )  # 'nothing' was intended because the given `until_link` would be never found on the links list
 
-    def get_liked_video_tweets_until(self, username: str, until_link: str, scroll_timeout: float = 0.8) -> list[str]:
+    def get_liked_video_tweets_until(self,
+                                     username: str,
+                                     until_link: str,
+                                     scroll_timeout: Optional[float] = None) -> list[str]:
         '''Scrolling down the list of liked tweets until the given `until_link` found
         Returns the list of links of liked tweets
         '''
+        return list(self.iter_liked_video_tweets_until(username, until_link, scroll_timeout))
+
+    def iter_liked_video_tweets_until(
+        self,
+        username: str,
+        until_link: str,
+        scroll_timeout: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[str]:
+        '''Scrolling down the list of liked tweets until the given `until_link` found
+        Yields the links of liked tweets in the timeline order as soon as they appear, at most `limit` links
+        '''
         self._goto_liked_tweets(username)
-        links: list[str] = []
-
-        previous_height = self.page_current_height
-        while True:
-            # 1. scroll down
-            # 2. get the link of tweets in the current screen(tweets are not reachable if it's not rendering)
-            # 3. break if page reaches to the bottom or the given `until_link` found
-
-            self.page.mouse.wheel(0, 1500)
-            time.sleep(scroll_timeout)  # wait for mouse wheel to scroll down
-            is_page_bottom = self.page_current_height == previous_height
-            if is_page_bottom:
-                logger.debug('Reached to the bottom of the liked tweets.')
-                break
-            previous_height = self.page_current_height
-
-            new_links = self._get_video_tweets_in_current_screen()
-            links.extend(new_links)
-            links = list(set(links))
+        yield from self._iter_video_tweets_until(until_link, scroll_timeout, limit)
 
-            logger.debug(f'Found {len(links)} liked tweets.')
-
-            if until_link in links:
-                logger.debug("Found the given 'until_link' in the liked tweets.")
-                break
-
-        return links
-
-    def get_recent_liked_tweet(self, username: str) -> str:
+    def get_recent_liked_tweet(self, username: str, timeout: float = 10000) -> str:
+        '''Waits at most `timeout` milliseconds until the link of the first liked tweet is rendered'''
         self._goto_liked_tweets(username)
-        return self._get_tweets_in_current_screen()[0]
+        deadline = time.monotonic() + timeout / 1000
+        while True:
+            links = self._get_tweets_in_current_screen()
+            if links:
+                return links[0]
+            if time.monotonic() >= deadline:
+                raise ValueError(f'No liked tweet of {username} is rendered.')
+            self.page.wait_for_timeout(self.scroll_policy.poll_interval * 1000)
 
     def _get_tweets_in_current_screen(self) -> list[str]:
-        links: list[str] = []
-
-        while True:
-            articles = self.page.locator('article')
-            article_length = articles.count()
-            try:
-                links = [
-                    'https://twitter.com' +
-                    (articles.nth(i).locator('div').locator('a').nth(3).get_attribute('href', timeout=500) or '')
-                    for i in range(article_length)
-                ]
-                break
-            except Error:  # if articles in the page are not reachable
-                logger.debug('Articles are not reachable. Update scroll position.')
-                self.page.mouse.wheel(0, 500)  #  scrolling down to refresh the articles
-                self.page.mouse.wheel(0, -500)  #  scrolling down to refresh the articles
+        return [href for href, _ in self._get_articles_in_current_screen()]
 
-        return links
+    def _get_articles_in_current_screen(self) -> list[tuple[str, bool]]:
+        '''Returns the link of the rendered tweets and whether each tweet has a video, in a single round trip'''
+        articles: list[dict[str, Any]] = self.page.evaluate(ARTICLES_IN_CURRENT_SCREEN_SCRIPT)
+        return parse_rendered_articles(articles)
 
     def get_video_of_tweet(self, link: str, timeout: Optional[float] = 10000) -> list[tuple[str, str]]:
         video_links: list[str] = []
@@ -146,9 +173,9 @@ class TwitterParser:
 
     def _goto_liked_tweets(self, username: str) -> None:
         self.page.goto(f'https://twitter.com/{username}/likes')
-        self.page.wait_for_selector('article')
+        self.page.wait_for_selector(TIMELINE_SELECTOR)
 
-    def get_all_media_video_tweets(self, username: str, scroll_timeout: float = 0.8) -> list[str]:
+    def get_all_media_video_tweets(self, username: str, scroll_timeout: Optional[float] = None) -> list[str]:
         """Get the username's all liked tweets
         Returns the list of links of liked tweets
         """
@@ -156,56 +183,77 @@ class TwitterParser:
             username, 'nothing', scroll_timeout
         )  # 'nothing' was intended because the given `until_link` would be never found on the links list
 
-    def get_media_video_tweets_until(self, username: str, until_link: str, scroll_timeout: float = 0.8) -> list[str]:
+    def get_media_video_tweets_until(self,
+                                     username: str,
+                                     until_link: str,
+                                     scroll_timeout: Optional[float] = None) -> list[str]:
         '''Scrolling down the list of media tweets until the given `until_link` found
         Returns the list of links of media tweets
         '''
+        return list(self.iter_media_video_tweets_until(username, until_link, scroll_timeout))
+
+    def iter_media_video_tweets_until(
+        self,
+        username: str,
+        until_link: str,
+        scroll_timeout: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[str]:
+        '''Scrolling down the list of media tweets until the given `until_link` found
+        Yields the links of media tweets in the timeline order as soon as they appear, at most `limit` links
+        '''
         self._goto_media_tweets(username)
-        links: list[str] = []
-
-        previous_height = self.page_current_height
+        yield from self._iter_video_tweets_until(until_link, scroll_timeout, limit)
+
+    def _iter_video_tweets_until(
+        self,
+        until_link: str,
+        scroll_timeout: Optional[float],
+        limit: Optional[int],
+    ) -> Iterator[str]:
+        scroll_state = TimelineScrollState(until_link, limit, self.scroll_policy, scroll_timeout)
         while True:
-            # 1. scroll down
-            # 2. get the link of tweets in the current screen(tweets are not reachable if it's not rendering)
-            # 3. break if page reaches to the bottom or the given `until_link` found
-
-            self.page.mouse.wheel(0, 1500)
-            time.sleep(scroll_timeout)  # wait for mouse wheel to scroll down
-            is_page_bottom = self.page_current_height == previous_height
-            if is_page_bottom:
-                break
-            previous_height = self.page_current_height
-
-            new_links = self._get_video_tweets_in_current_screen()
-            links.extend(new_links)
-            links = list(set(links))
-
-            logger.debug(f'Found {len(links)} video tweets.')
-
-            if until_link in links:
+            # the tweets are not reachable if they are not rendered, so scroll down until it's time to stop
+            yield from scroll_state.add_found_links(self._get_new_video_tweets())
+            if scroll_state.is_finished:
                 break
+            scroll_state.has_new_content = self._scroll_down(max_wait=scroll_state.max_wait)
 
+    def _scroll_down(self, max_wait: float) -> bool:
+        '''Scrolls down, then waits until new tweets are rendered or a timeline request finishes
+        Returns whether anything new appeared within `max_wait` seconds
+        '''
+        previous_marker: str = self.page.evaluate(CONTENT_MARKER_SCRIPT)
+        previous_request_count = self._timeline_capture.finished_request_count
+
+        self.page.mouse.wheel(0, self.scroll_policy.wheel_delta)
+        deadline = time.monotonic() + max_wait
+        while time.monotonic() < deadline:
+            self.page.wait_for_timeout(self.scroll_policy.poll_interval * 1000)  # lets the page events dispatched
+            if self._timeline_capture.finished_request_count != previous_request_count:
+                return True
+            if self.page.evaluate(CONTENT_MARKER_SCRIPT) != previous_marker:
+                return True
+        return False
+
+    def _get_new_video_tweets(self) -> list[str]:
+        if not self.capture_timeline_responses:
+            return self._get_video_tweets_in_current_screen()
+        return self._get_video_tweets_in_captured_responses()
+
+    def _get_video_tweets_in_captured_responses(self) -> list[str]:
+        links: list[str] = []
+        response: Response
+        for response in self._timeline_capture.take_responses():
+            try:
+                links.extend(self._timeline_capture.add_timeline_payload(response.json()))
+            except (Error, ValueError):  # the response body is not available anymore, or not a JSON
+                logger.debug(f'Failed to read the timeline response: {response.url}')
         return links
 
     def _goto_media_tweets(self, username: str) -> None:
         self.page.goto(f'https://twitter.com/{username}/media')
-        self.page.wait_for_selector('article')
+        self.page.wait_for_selector(TIMELINE_SELECTOR)
 
     def _get_video_tweets_in_current_screen(self) -> list[str]:
-        links: list[str] = []
-
-        while True:
-            articles = self.page.locator('article:has(video)')
-            article_length = articles.count()
-            try:
-                links = [
-                    'https://twitter.com' +
-                    (articles.nth(i).locator('div').locator('a').nth(3).get_attribute('href', timeout=500) or '')
-                    for i in range(article_length)
-                ]
-                break
-            except Error:  # if articles in the page are not reachable
-                self.page.mouse.wheel(0, 500)  #  scrolling down to refresh the articles
-                self.page.mouse.wheel(0, -500)  #  scrolling down to refresh the articles
-
-        return links
+        return [href for href, has_video in self._get_articles_in_current_screen() if has_video]
@@ -0,0 +1,65 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import yt_dlp
+
+
+@dataclass(frozen=True)
+class YoutubeDLPoolStats:
+    instance_count: int
+    link_count: int
+    setup_seconds: float  # spent creating the instances and loading their cookies
+
+    @property
+    def setup_seconds_per_link(self) -> float:
+        return self.setup_seconds / self.link_count if self.link_count else 0
+
+    def describe(self) -> str:
+        return (f'{self.instance_count} instances set up in {self.setup_seconds:.2f}s '
+                f'for {self.link_count} links ({self.setup_seconds_per_link * 1000:.1f}ms per link)')
+
+
+class YoutubeDLPool:
+    '''One long-lived `YoutubeDL` per thread, created with the params of `params_factory`
+
+    Creating a `YoutubeDL` loads the extractors, the cookies of `cookiesfrombrowser` and the HTTP opener,
+    which costs as much as downloading a short clip; every link of a worker reuses them instead.
+    '''
+
+    def __init__(self, params_factory: Callable[[], dict[str, Any]]):
+        self._params_factory = params_factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances: list[yt_dlp.YoutubeDL] = []
+        self._link_count = 0
+        self._setup_seconds = 0.0
+
+    def acquire(self) -> yt_dlp.YoutubeDL:
+        '''Returns the `YoutubeDL` of the current thread, counting a link downloaded with it'''
+        ydl: yt_dlp.YoutubeDL = getattr(self._local, 'ydl', None) or self._create()
+        with self._lock:
+            self._link_count += 1
+        return ydl
+
+    def get_stats(self) -> YoutubeDLPoolStats:
+        with self._lock:
+            return YoutubeDLPoolStats(len(self._instances), self._link_count, self._setup_seconds)
+
+    def close(self) -> None:
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for ydl in instances:
+            ydl.close()
+
+    def _create(self) -> yt_dlp.YoutubeDL:
+        started_at = time.perf_counter()
+        ydl = yt_dlp.YoutubeDL(self._params_factory())
+        if ydl.params.get('cookiesfrombrowser'):
+            ydl.cookiejar  # loads the cookies of the browser now, rather than on the first link
+        self._local.ydl = ydl
+        with self._lock:
+            self._instances.append(ydl)
+            self._setup_seconds += time.perf_counter() - started_at
+        return ydl